@@ -2,10 +2,20 @@ import streamlit as st
 import time
 import os
 import json
+from contextlib import ExitStack
 from PIL import Image, ImageDraw
 import google.generativeai as genai
+import app_metrics
+from app_metrics import section, timed
+from lab_cache import ClassificationCache
+from lab_resolver import SolutionResolver, normalize_name
+from lab_ai import SingleFlight, ModelGovernor, ModelBusy, iter_text
+
+# 실행 시간 측정 시작 (APP_METRICS=1 일 때만)
+app_metrics.begin_run("lab")
 
 # --- 이미지 생성 함수 ---
+@timed("lab.create_images")
 def create_images_if_needed():
     """필요한 이미지 파일이 없으면 생성합니다."""
     image_dir = "images"
@@ -32,6 +42,7 @@ def create_images_if_needed():
 RESULTS_FILE = "results.json"
 CHAT_LOG_FILE = "chat_log.json"
 
+@timed("lab.load_results")
 def load_results():
     """JSON 파일에서 실험 결과를 불러옵니다."""
     if os.path.exists(RESULTS_FILE):
@@ -39,11 +50,13 @@ def load_results():
             return json.load(f)
     return {"산성": [], "염기성": []}
 
+@timed("lab.save_results")
 def save_results(results):
     """실험 결과를 JSON 파일에 저장합니다."""
     with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
 
+@timed("lab.load_chat_log")
 def load_chat_log():
     """JSON 파일에서 채팅 기록을 불러옵니다."""
     if os.path.exists(CHAT_LOG_FILE):
@@ -51,11 +64,29 @@ def load_chat_log():
             return json.load(f)
     return []
 
+@timed("lab.save_chat_log")
 def save_chat_log(log):
     """채팅 기록을 JSON 파일에 저장합니다."""
     with open(CHAT_LOG_FILE, 'w', encoding='utf-8') as f:
         json.dump(log, f, ensure_ascii=False, indent=2)
 
+# AI에게 물어본 용액 분류 캐시 (파일에 저장되어 앱을 다시 켜도, 여러 프로세스가 함께 써도 유지)
+CLASSIFY_CACHE_FILE = "classify_cache.db"
+
+@st.cache_resource
+def get_classification_cache():
+    return ClassificationCache(CLASSIFY_CACHE_FILE)
+
+# 같은 용액을 동시에 물어본 세션들이 AI 호출 한 번을 함께 쓰도록 묶는 도우미 (프로세스에 하나)
+@st.cache_resource
+def get_classify_flight():
+    return SingleFlight()
+
+# 모든 AI 호출(용액 분류, AI 과학자 질문)이 함께 지나가는 호출 속도/동시 실행 수 제한 (프로세스에 하나)
+@st.cache_resource
+def get_ai_governor():
+    return ModelGovernor()
+
 # --- AI 모델 설정 함수 ---
 def configure_ai():
     """API 키를 사용하여 Gemini 모델을 설정합니다."""
@@ -79,6 +110,9 @@ st.set_page_config(
 
 # AI 모델 설정
 ai_model = configure_ai()
+classification_cache = get_classification_cache()
+classify_flight = get_classify_flight()
+ai_governor = get_ai_governor()
 
 # 채팅 기록 초기화
 if "messages" not in st.session_state:
@@ -98,6 +132,58 @@ SOLUTION_DATA = {
     "물": "중성", "소금물": "중성"
 }
 
+# 띄어쓰기나 오타가 있어도 아는 용액을 찾는 색인 (기본 지식 + 전에 AI에게 물어본 용액)
+@st.cache_resource
+def get_solution_resolver():
+    resolver = SolutionResolver(SOLUTION_DATA)
+    resolver.add_many(get_classification_cache().entries())
+    return resolver
+
+solution_resolver = get_solution_resolver()
+
+def classify_with_ai(name):
+    """Gemini에게 용액의 성질을 묻고 답을 캐시에 저장합니다. 답을 얻지 못하면 "알 수 없음"을 반환합니다.
+    호출이 몰려서 지금 물어볼 수 없으면 ModelBusy 를 던집니다."""
+    if not ai_model:
+        return "알 수 없음"
+    # AI에게 단답형으로 질문하여 결과를 얻음
+    prompt = f"'{name}'은(는) '산성', '염기성', '중성' 중 무엇에 해당하나요? 다른 설명 없이 '산성', '염기성', '중성' 중 하나로만 대답해주세요."
+    try:
+        with ai_governor.slot("classify"), section("lab.ai_classify"):
+            response = ai_model.generate_content(prompt)
+        cleaned_response = response.text.strip()
+    except ModelBusy:
+        raise
+    except Exception:
+        return "알 수 없음"
+    if cleaned_response not in ["산성", "염기성", "중성"]:
+        return "알 수 없음"
+    # 학습한 내용을 캐시에 저장 (다음에는 AI에게 묻지 않음)
+    classification_cache.put(name, cleaned_response)
+    solution_resolver.add(name, cleaned_response)
+    return cleaned_response
+
+def classify_once(name):
+    """같은 용액을 여러 세션이 동시에 물어보면 AI 호출 한 번의 답을 함께 씁니다."""
+    def run():
+        # 기다리는 사이 다른 세션이 답을 저장했을 수 있으므로 한 번 더 확인
+        return classification_cache.peek(name) or classify_with_ai(name)
+    return classify_flight.do(normalize_name(name), run)
+
+def waiting_note():
+    """AI 호출 대기열에 먼저 온 호출이 있으면 안내 문구를 반환합니다."""
+    waiting = ai_governor.queue_depth()
+    return f" (앞에서 {waiting}명이 기다리고 있어요)" if waiting else ""
+
+def choose_suggestion(name, ask_ai):
+    """'혹시 이 용액인가요?'에서 고른 이름으로 다시 실험합니다. (버튼 콜백)"""
+    st.session_state.experiment_request = {
+        "name": name,
+        "indicator": st.session_state.suggestion["indicator"],
+        "ask_ai": ask_ai,
+    }
+    st.session_state.suggestion = None
+
 # --- 2. 앱 제목 및 설명 ---
 st.title("🧪 AI 산-염기 탐구 실험실")
 st.markdown("### 궁금한 용액을 AI와 함께 탐구해보고 산성인지 염기성인지 알아봅시다!")
@@ -106,7 +192,7 @@ st.markdown("### 궁금한 용액을 AI와 함께 탐구해보고 산성인지 
 st.header("🔬 활동 1: 가상 실험하기")
 col1, col2 = st.columns([2, 1.5])
 
-with col1:
+with col1, section("lab.experiment_setup"):
     st.subheader("📋 실험 준비")
     
     # 1. 용액 이름 입력받기
@@ -124,43 +210,66 @@ with col1:
     # 3. 실험 시작 버튼
     start_button = st.button("💧 실험 시작!")
 
-with col2:
+with col2, section("lab.experiment_result"):
     st.subheader("📊 실험 결과")
     
+    # '혹시 이 용액인가요?'에서 고른 요청이 있으면 그 이름으로 실험
+    request = st.session_state.pop("experiment_request", None)
+
     # 1. '실험 시작' 버튼을 눌렀을 때의 로직
     if start_button:
+        st.session_state.suggestion = None
         if not solution_name:
             st.warning("어떤 용액으로 실험할지 입력해주세요!")
         else:
-            property = SOLUTION_DATA.get(solution_name)
-
-            # 1. AI의 지식 데이터에 없는 경우, Gemini에게 물어보기
+            request = {"name": solution_name, "indicator": indicator, "ask_ai": False}
+
+    if request:
+        name = request["name"]
+        property = SOLUTION_DATA.get(name)
+
+        # 1. 띄어쓰기나 오타가 있어도 아는 용액(전에 AI에게 물어본 답 포함)이면 AI에게 묻지 않고 바로 답하기
+        suggestions = []
+        if property is None and not request["ask_ai"]:
+            match, suggestions = solution_resolver.resolve(name)
+            if match:
+                name, property = match
+
+        # 2. 그래도 없으면 전에 AI에게 물어본 답 찾기 (여기서 못 찾으면 AI에게 묻게 되므로 캐시 미스로 셈)
+        if property is None and not suggestions:
+            property = classification_cache.get(name)
+
+        if property is None and suggestions:
+            # 3. 비슷한 이름이 있으면 AI에게 묻기 전에 학생에게 확인
+            st.session_state.current_experiment = None
+            st.session_state.suggestion = {"name": name, "indicator": request["indicator"], "choices": suggestions}
+        else:
+            # 4. 그래도 없는 경우, Gemini에게 물어보기
             if property is None:
-                if ai_model:
-                    with st.spinner(f"AI가 '{solution_name}'에 대해 학습한 내용을 찾고 있어요..."):
-                        # AI에게 단답형으로 질문하여 결과를 얻음
-                        prompt = f"'{solution_name}'은(는) '산성', '염기성', '중성' 중 무엇에 해당하나요? 다른 설명 없이 '산성', '염기성', '중성' 중 하나로만 대답해주세요."
-                        try:
-                            response = ai_model.generate_content(prompt)
-                            cleaned_response = response.text.strip()
-
-                            if cleaned_response in ["산성", "염기성", "중성"]:
-                                property = cleaned_response
-                                # 학습한 내용을 SOLUTION_DATA에 추가 (선택적)
-                                SOLUTION_DATA[solution_name] = property
-                            else:
-                                property = "알 수 없음"
-                        except Exception:
-                            property = "알 수 없음"
-                else:
-                    property = "알 수 없음"
+                with st.spinner(f"AI가 '{name}'에 대해 학습한 내용을 찾고 있어요...{waiting_note()}"):
+                    try:
+                        property = classify_once(name)
+                    except ModelBusy as busy:
+                        st.session_state.current_experiment = None
+                        st.warning(f"지금 AI에게 질문하는 친구들이 많아요. {busy.retry_after:.0f}초쯤 뒤에 다시 실험해 주세요. ⏳")
 
             # 현재 실험 정보를 세션 상태에 저장
-            st.session_state.current_experiment = {
-                "name": solution_name,
-                "indicator": indicator,
-                "property": property
-            }
+            if property is not None:
+                st.session_state.current_experiment = {
+                    "name": name,
+                    "typed": request["name"] if name != request["name"] else None,
+                    "indicator": request["indicator"],
+                    "property": property
+                }
+
+    # 비슷한 이름을 찾았으면 '혹시 이 용액인가요?' 보여주기
+    suggestion = st.session_state.get("suggestion")
+    if suggestion:
+        st.info(f"'{suggestion['name']}'은(는) 처음 보는 이름이에요. 혹시 이 용액인가요?")
+        for choice in suggestion["choices"]:
+            st.button(f"🔎 {choice}", key=f"suggest_{choice}", on_click=choose_suggestion, args=(choice, False))
+        st.button(f"🤖 '{suggestion['name']}' 그대로 AI에게 물어보기", key="suggest_ask_ai",
+                  on_click=choose_suggestion, args=(suggestion["name"], True))
 
     # 2. 세션 상태에 저장된 실험 정보가 있으면 결과 표시
     if st.session_state.current_experiment:
@@ -168,6 +277,8 @@ with col2:
         prop = exp["property"]
         
         st.success(f"'{exp['name']}' 실험 완료!")
+        if exp.get("typed"):
+            st.caption(f"'{exp['typed']}'을(를) '{exp['name']}'(으)로 알아들었어요.")
         
         # 지시약과 용액 성질에 따라 결과 표시
         if exp["indicator"] == "리트머스 종이":
@@ -210,14 +321,14 @@ with col2:
                 st.session_state.current_experiment = None
                 time.sleep(2)
                 st.rerun() # 화면 새로고침
-    else:
+    elif not suggestion:
         st.info("왼쪽에서 실험할 용액을 입력하고 '실험 시작' 버튼을 눌러주세요.")
 
 # --- 4. 우리 반 전체 실험 결과 ---
 st.header("📊 활동 2: 우리 반 전체 실험 결과 (교사용)")
 
-with st.expander("⚙️ 관리자 페이지 (클릭하여 열기)"):
-    tab1, tab2 = st.tabs(["실험 결과", "학생 질문 목록"])
+with st.expander("⚙️ 관리자 페이지 (클릭하여 열기)"), section("lab.admin"):
+    tab1, tab2, tab3 = st.tabs(["실험 결과", "학생 질문 목록", "성능 지표"])
 
     with tab1:
         st.subheader("전체 실험 결과 목록")
@@ -252,6 +363,51 @@ with st.expander("⚙️ 관리자 페이지 (클릭하여 열기)"):
             st.markdown(f"> A. {entry['answer']}")
             st.markdown("---")
 
+    with tab3:
+        st.subheader("구간별 실행 시간과 메모리")
+        app_metrics.render_panel(st)
+
+        st.subheader("AI 분류 캐시")
+        if st.button("⚠️ AI 분류 캐시 비우기"):
+            classification_cache.clear()
+            st.success("AI 분류 캐시를 비웠습니다. 페이지를 새로고침합니다.")
+            time.sleep(2)
+            st.rerun()
+
+        cache_stats = classification_cache.stats()
+        flight_stats = classify_flight.stats()
+        cache_col1, cache_col2, cache_col3, cache_col4 = st.columns(4)
+        cache_col1.metric("적중률", f"{cache_stats['hit_rate'] * 100:.0f}%")
+        cache_col2.metric("아낀 AI 호출", cache_stats["hits"])
+        cache_col3.metric("합쳐진 동시 호출", flight_stats["deduplicated"],
+                          help="같은 용액을 여러 학생이 동시에 물어봐서 AI 호출 한 번으로 합친 횟수 (이 프로세스)")
+        cache_col4.metric("저장된 용액", cache_stats["entries"])
+        cached = classification_cache.entries()
+        if cached:
+            st.dataframe([{"용액": name, "성질": value} for name, value in cached])
+
+        st.subheader("AI 호출 대기열")
+        governor_stats = ai_governor.stats()
+        queue_col1, queue_col2, queue_col3, queue_col4 = st.columns(4)
+        queue_col1.metric("기다리는 호출", governor_stats["waiting"])
+        queue_col2.metric("실행 중", f"{governor_stats['active']} / {governor_stats['max_concurrent']}")
+        queue_col3.metric("대기 시간 초과", governor_stats["rejected"],
+                          help="대기열에서 너무 오래 기다려 학생에게 '잠시 뒤에 다시' 안내한 횟수")
+        queue_col4.metric("한도 초과 (429)", governor_stats["throttled"],
+                          help="AI 호출 한도를 넘었다는 오류를 받아 잠시 호출을 멈춘 횟수")
+        if governor_stats["paused_for"] > 0:
+            st.warning(f"AI 호출 한도를 넘어서 {governor_stats['paused_for']:.0f}초 동안 새 호출을 멈추고 있습니다.")
+        st.caption(f"분당 최대 {governor_stats['rate_per_minute']:g}회, 동시에 최대 {governor_stats['max_concurrent']}개까지 호출합니다.")
+        kind_names = {"classify": "용액 분류", "chat": "AI 과학자 질문"}
+        st.dataframe([{
+            "호출 종류": kind_names.get(kind, kind),
+            "우선순위": row["priority"],
+            "기다리는 중": row["waiting"],
+            "가장 오래 기다린 시간(초)": round(row["oldest_wait"], 1),
+            "평균 대기(초)": round(row["avg_wait"], 2),
+            "최대 대기(초)": round(row["max_wait"], 2),
+        } for kind, row in governor_stats["kinds"].items()])
+
 # --- 5. AI 과학자에게 질문하기 ---
 st.header("👩‍🔬 활동 3: AI 과학자에게 질문하기")
 
@@ -268,23 +424,36 @@ if ai_model:
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # AI 응답 생성 및 표시
-        with st.chat_message("assistant"):
-            with st.spinner("AI 과학자 선생님이 답변을 생각하고 있어요..."):
-                response = ai_model.generate_content(prompt)
-                response_text = response.text
-                st.markdown(response_text)
-        
-        # AI 응답 기록
-        st.session_state.messages.append({"role": "assistant", "content": response_text})
-
-        # 전체 채팅 로그에 현재 대화 저장
-        chat_log = load_chat_log()
-        chat_log.append({
-            "question": prompt,
-            "answer": response_text,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-        })
-        save_chat_log(chat_log)
+        # AI 응답 생성 및 표시 (답변이 끝날 때까지 호출 자리를 차지함)
+        response_text = None
+        with st.chat_message("assistant"), section("lab.ai_chat"):
+            try:
+                with ExitStack() as call:
+                    # 호출 자리를 기다리는 동안과 첫 글자가 올 때까지만 안내를 보여주고, 그 뒤로는 생성되는 대로 바로 보여줌
+                    with st.spinner(f"AI 과학자 선생님이 답변을 생각하고 있어요...{waiting_note()}"):
+                        call.enter_context(ai_governor.slot("chat"))
+                        with section("lab.ai_chat.first_token"):
+                            response = ai_model.generate_content(prompt, stream=True)
+                    response_text = st.write_stream(iter_text(response))
+            except ModelBusy as busy:
+                st.warning(f"지금 AI 과학자 선생님에게 질문하는 친구들이 많아요. {busy.retry_after:.0f}초쯤 뒤에 다시 물어봐 주세요. ⏳")
+                # 답을 받지 못한 질문은 대화 기록에서 빼서 다시 물어볼 수 있게 함
+                st.session_state.messages.pop()
+
+        if response_text is not None:
+            # AI 응답 기록
+            st.session_state.messages.append({"role": "assistant", "content": response_text})
+
+            # 전체 채팅 로그에 현재 대화 저장
+            chat_log = load_chat_log()
+            chat_log.append({
+                "question": prompt,
+                "answer": response_text,
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+            })
+            save_chat_log(chat_log)
 else:
     st.warning("AI 모델을 불러올 수 없습니다. `.streamlit/secrets.toml` 파일에 API 키를 올바르게 설정했는지 확인해주세요.")
+
+# 실행 시간 측정 끝
+app_metrics.end_run()
@@ -0,0 +1,239 @@
+"""
+앱 실행 구간별 시간 측정 (두 앱이 함께 사용)
+Streamlit 스크립트가 한 번 실행될 때마다 이름 붙인 구간(메타데이터 읽기, 필터, 차트 등)의 시간을 재고
+메모리 사용량을 기록해, Prometheus 텍스트 형식 파일/주소나 관리자 화면으로 보여줍니다.
+
+    APP_METRICS=1 streamlit run teacher_portfolio.py                      # 측정 켜기 (관리자 화면에 표시)
+    APP_METRICS=1 APP_METRICS_FILE=metrics.prom streamlit run app.py     # 텍스트 파일로 내보내기
+    APP_METRICS=1 APP_METRICS_PORT=9108 streamlit run app.py             # http://localhost:9108/metrics
+
+측정을 켜지 않으면 section()/timed() 는 아무 일도 하지 않는 빈 블록이라 속도에 영향이 거의 없습니다.
+"""
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ENABLED = os.environ.get("APP_METRICS", "").lower() in ("1", "true", "yes", "on")
+METRICS_FILE = os.environ.get("APP_METRICS_FILE")
+METRICS_PORT = int(os.environ.get("APP_METRICS_PORT", "0") or 0)
+METRICS_HOST = os.environ.get("APP_METRICS_HOST", "127.0.0.1")
+
+# 히스토그램 구간 경계 (초)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 관리자 화면의 p50/p99 계산에 쓰는 최근 기록 수
+RECENT = 500
+# 텍스트 파일을 다시 쓰는 최소 간격 (초)
+WRITE_INTERVAL = 10
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_sections = {}
+_memory = {"rss": 0, "peak": 0}
+_runs = {}
+_last_write = 0.0
+_server = None
+
+
+class _Section:
+    """구간 하나의 누적 기록"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent = deque(maxlen=RECENT)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+
+def _resident_bytes():
+    """현재 메모리 사용량(RSS)을 바이트로 반환합니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def observe(name, seconds):
+    """구간 name 에 걸린 시간을 기록합니다."""
+    with _lock:
+        section = _sections.get(name)
+        if section is None:
+            section = _sections[name] = _Section()
+        section.observe(seconds)
+
+
+@contextmanager
+def _timed_section(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def section(name):
+    """with section("이름"): 블록의 실행 시간을 잽니다. 측정이 꺼져 있으면 빈 블록입니다."""
+    return _timed_section(name) if ENABLED else _NOOP
+
+
+def timed(name=None):
+    """함수 실행 시간을 재는 데코레이터입니다. 측정이 꺼져 있으면 함수를 그대로 돌려줍니다."""
+    def decorator(func):
+        if not ENABLED:
+            return func
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed_section(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def begin_run(app_name):
+    """스크립트 실행 시작을 표시합니다. 스크립트 맨 위에서 부릅니다."""
+    if not ENABLED:
+        return
+    # 세션마다 따로 재야 하지만 Streamlit 은 세션마다 다른 스레드에서 스크립트를 실행함
+    _runs[threading.get_ident()] = (app_name, time.perf_counter())
+    _ensure_server()
+
+
+def end_run():
+    """스크립트 실행 끝을 표시하고 전체 시간과 메모리를 기록합니다. 스크립트 맨 아래에서 부릅니다.
+    (st.rerun()/st.stop() 으로 중간에 끝난 실행은 기록되지 않습니다.)"""
+    global _last_write
+    if not ENABLED:
+        return
+    started = _runs.pop(threading.get_ident(), None)
+    if started is None:
+        return
+    app_name, started_at = started
+    observe(f"{app_name}.run", time.perf_counter() - started_at)
+    rss = _resident_bytes()
+    with _lock:
+        _memory["rss"] = rss
+        _memory["peak"] = max(_memory["peak"], rss)
+        should_write = METRICS_FILE and time.monotonic() - _last_write >= WRITE_INTERVAL
+        if should_write:
+            _last_write = time.monotonic()
+    if should_write:
+        write_textfile(METRICS_FILE)
+
+
+def snapshot():
+    """구간별 (이름, 횟수, 평균 ms, p50 ms, p99 ms, 최대 ms) 목록과 메모리 정보를 반환합니다."""
+    rows = []
+    with _lock:
+        for name, section in sorted(_sections.items()):
+            recent = sorted(section.recent)
+            rows.append({
+                "구간": name,
+                "횟수": section.count,
+                "평균 ms": round(section.total / section.count * 1000, 2),
+                "p50 ms": round(recent[len(recent) // 2] * 1000, 2),
+                "p99 ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.99))] * 1000, 2),
+                "최대 ms": round(section.max * 1000, 2),
+            })
+        memory = dict(_memory)
+    return rows, memory
+
+
+def render_prometheus():
+    """모든 기록을 Prometheus 텍스트 형식으로 반환합니다."""
+    lines = [
+        "# HELP app_section_seconds Time spent in a named section of a Streamlit script run.",
+        "# TYPE app_section_seconds histogram",
+    ]
+    with _lock:
+        for name, section in sorted(_sections.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(BUCKETS, section.buckets):
+                cumulative += count
+                lines.append(f'app_section_seconds_bucket{{section="{label}",le="{bound}"}} {cumulative}')
+            lines.append(f'app_section_seconds_bucket{{section="{label}",le="+Inf"}} {section.count}')
+            lines.append(f'app_section_seconds_sum{{section="{label}"}} {section.total:.6f}')
+            lines.append(f'app_section_seconds_count{{section="{label}"}} {section.count}')
+        lines += [
+            "# HELP app_resident_memory_bytes Resident memory sampled at the end of the last script run.",
+            "# TYPE app_resident_memory_bytes gauge",
+            f"app_resident_memory_bytes {_memory['rss']}",
+            "# HELP app_resident_memory_peak_bytes Highest resident memory sampled so far.",
+            "# TYPE app_resident_memory_peak_bytes gauge",
+            f"app_resident_memory_peak_bytes {_memory['peak']}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path):
+    """Prometheus 텍스트 파일로 내보냅니다. (node_exporter textfile 수집기용, 원자적으로 교체)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _ensure_server():
+    """APP_METRICS_PORT 가 설정되어 있으면 /metrics 주소를 한 번만 엽니다."""
+    global _server
+    if not METRICS_PORT or _server is not None:
+        return
+    with _lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+        except OSError:
+            # 다른 앱이 이미 같은 주소를 쓰고 있음
+            _server = False
+            return
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+
+
+def render_panel(st):
+    """관리자 화면에 구간별 시간과 메모리를 표로 보여줍니다."""
+    if not ENABLED:
+        st.info("성능 측정이 꺼져 있습니다. 환경 변수 APP_METRICS=1 로 앱을 실행하면 켜집니다.")
+        return
+    rows, memory = snapshot()
+    col1, col2 = st.columns(2)
+    col1.metric("현재 메모리", f"{memory['rss'] / (1024*1024):.1f} MB")
+    col2.metric("최대 메모리", f"{memory['peak'] / (1024*1024):.1f} MB")
+    if rows:
+        st.dataframe(rows)
+    else:
+        st.info("아직 기록된 실행이 없습니다.")
@@ -0,0 +1,263 @@
+"""
+산-염기 실험실 AI 호출 도우미
+한 반 학생들이 한꺼번에 같은 용액을 실험하면 세션마다 같은 질문을 AI에게 보내게 됩니다.
+SingleFlight 는 같은 키로 동시에 들어온 호출을 하나로 합쳐서, 먼저 온 호출의 답을 나머지가 함께 씁니다.
+iter_text 는 stream=True 로 받은 답을 글자 조각 단위로 꺼내 화면에 바로 보여줄 수 있게 합니다.
+ModelGovernor 는 프로세스 안의 모든 AI 호출이 함께 지나가는 관문입니다.
+분당 호출 수(토큰 버킷)와 동시에 실행하는 호출 수를 제한하고, 기다리는 호출은 우선순위 대기열에 세웁니다.
+한도를 넘었다는 오류(429)를 받으면 잠시 새 호출을 멈추고, 기다리다 지친 호출은 ModelBusy 로 알려 줍니다.
+
+    LAB_AI_RATE_PER_MINUTE=15 LAB_AI_MAX_CONCURRENT=4 streamlit run app.py
+"""
+import os
+import time
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+try:
+    from google.api_core.exceptions import ResourceExhausted
+except ImportError:
+    ResourceExhausted = None
+
+# 분당 AI 호출 수 (Gemini 무료 한도에 맞춤)
+RATE_PER_MINUTE = float(os.environ.get("LAB_AI_RATE_PER_MINUTE", "15") or 15)
+# 한꺼번에 몰려서 보낼 수 있는 호출 수 (토큰 버킷 크기)
+BURST = int(os.environ.get("LAB_AI_BURST", "5") or 5)
+# 동시에 실행하는 호출 수
+MAX_CONCURRENT = int(os.environ.get("LAB_AI_MAX_CONCURRENT", "4") or 4)
+# 대기열에서 기다리는 최대 시간 (초). 넘으면 ModelBusy
+MAX_WAIT = float(os.environ.get("LAB_AI_MAX_WAIT", "30") or 30)
+# 한도 초과 오류(429)를 받으면 새 호출을 멈추는 시간 (초)
+QUOTA_BACKOFF = float(os.environ.get("LAB_AI_QUOTA_BACKOFF", "20") or 20)
+# 호출 종류별 우선순위 (작을수록 먼저). 분류는 학생 실험을 막고 있으므로 채팅보다 먼저 보냄
+PRIORITIES = {
+    "classify": int(os.environ.get("LAB_AI_PRIORITY_CLASSIFY", "0") or 0),
+    "chat": int(os.environ.get("LAB_AI_PRIORITY_CHAT", "1") or 1),
+}
+# 이 시간(초)만큼 기다릴 때마다 우선순위를 한 단계 올려서 낮은 순위 호출도 언젠가는 차례가 오게 함
+PRIORITY_AGING = 10.0
+# 차례를 기다리는 호출이 대기열을 다시 확인하는 간격 (초)
+POLL_INTERVAL = 0.5
+# 대기 시간 통계에 쓰는 최근 기록 수
+RECENT = 200
+
+
+class SingleFlight:
+    """같은 키의 동시 호출을 한 번만 실행하는 도우미 (프로세스 안에서 공유)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    def do(self, key, func):
+        """key로 진행 중인 호출이 있으면 그 결과를 기다려 돌려주고, 없으면 func()를 실행합니다.
+        func()가 예외를 던지면 기다리던 호출에도 같은 예외가 전달됩니다."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.deduplicated += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self):
+        """실행한 호출 수, 합쳐진(중복) 호출 수, 지금 진행 중인 키 수를 반환합니다."""
+        with self._lock:
+            return {"calls": self.calls, "deduplicated": self.deduplicated, "in_flight": len(self._in_flight)}
+
+
+def iter_text(response):
+    """generate_content(..., stream=True) 응답에서 글자 조각을 차례로 돌려줍니다. (st.write_stream 용)
+    안전 필터 등으로 글자가 없는 조각은 건너뜁니다."""
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            continue
+        if text:
+            yield text
+
+
+class ModelBusy(RuntimeError):
+    """AI 호출이 몰려서 지금은 보낼 수 없을 때 발생합니다. retry_after 초 뒤에 다시 시도하면 됩니다."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def is_quota_error(error):
+    """API 한도 초과(429) 오류인지 확인합니다."""
+    if ResourceExhausted is not None and isinstance(error, ResourceExhausted):
+        return True
+    return getattr(error, "code", None) == 429
+
+
+class _Ticket:
+    __slots__ = ("kind", "priority", "seq", "enqueued")
+
+    def __init__(self, kind, priority, seq, enqueued):
+        self.kind = kind
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = enqueued
+
+
+class ModelGovernor:
+    """모든 AI 호출이 함께 쓰는 호출 속도(토큰 버킷) + 동시 실행 수 제한 + 우선순위 대기열 (프로세스 안에서 공유)"""
+
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE, burst=BURST, max_concurrent=MAX_CONCURRENT,
+                 max_wait=MAX_WAIT, priorities=None, quota_backoff=QUOTA_BACKOFF):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_wait = max_wait
+        self.priorities = dict(PRIORITIES if priorities is None else priorities)
+        self.quota_backoff = quota_backoff
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._blocked_until = 0.0
+        self._active = 0
+        self._waits = {}
+        self._counts = {"admitted": 0, "rejected": 0, "throttled": 0}
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _head(self, now):
+        # 같은 우선순위는 먼저 온 순서, 오래 기다린 호출은 우선순위를 올려 줌
+        return min(self._queue, key=lambda t: (t.priority - (now - t.enqueued) / PRIORITY_AGING, t.seq))
+
+    def _delay(self, now):
+        """지금 맨 앞 호출을 보낼 수 있으면 0, 아니면 다시 확인할 때까지 기다릴 시간(초)을 반환합니다."""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._active >= self.max_concurrent:
+            # 호출이 끝나면 release 가 깨워 줌
+            return None
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0
+        return (1 - self._tokens) / self.rate if self.rate > 0 else None
+
+    def _retry_after(self, now):
+        backlog = (len(self._queue) + self._active) / self.rate if self.rate > 0 else self.max_wait
+        return max(self._blocked_until - now, backlog, 1.0)
+
+    def acquire(self, kind, timeout=None):
+        """kind 호출의 차례가 올 때까지 기다립니다. 기다린 시간(초)을 반환합니다.
+        timeout(기본 max_wait) 안에 차례가 오지 않으면 ModelBusy 를 던집니다."""
+        timeout = self.max_wait if timeout is None else timeout
+        with self._cond:
+            now = time.monotonic()
+            ticket = _Ticket(kind, self.priorities.get(kind, max(self.priorities.values(), default=0) + 1),
+                             next(self._seq), now)
+            self._queue.append(ticket)
+            deadline = now + timeout
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._delay(now) if self._head(now) is ticket else None
+                    if delay == 0:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._counts["rejected"] += 1
+                        raise ModelBusy("AI 호출 대기열이 가득 찼습니다.", self._retry_after(now))
+                    # 오래 기다린 호출이 맨 앞으로 바뀔 수 있으므로 차례가 아니어도 가끔 다시 확인
+                    self._cond.wait(min(remaining, POLL_INTERVAL if delay is None else delay))
+            except BaseException:
+                self._queue.remove(ticket)
+                # 뒤에 선 호출이 맨 앞이 되었을 수 있음
+                self._cond.notify_all()
+                raise
+            self._queue.remove(ticket)
+            self._tokens -= 1
+            self._active += 1
+            self._counts["admitted"] += 1
+            waited = now - ticket.enqueued
+            self._waits.setdefault(kind, deque(maxlen=RECENT)).append(waited)
+            self._cond.notify_all()
+            return waited
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def backoff(self, seconds=None):
+        """한도 초과 오류를 받았을 때 seconds 동안 새 호출을 멈춥니다."""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + (seconds or self.quota_backoff))
+            self._tokens = 0.0
+            self._counts["throttled"] += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, kind, timeout=None):
+        """with governor.slot("classify"): 블록 안에서 AI를 호출합니다.
+        블록 안에서 한도 초과 오류가 나면 잠시 새 호출을 멈추고 ModelBusy 로 바꿔 던집니다."""
+        self.acquire(kind, timeout)
+        try:
+            yield
+        except Exception as error:
+            if not is_quota_error(error):
+                raise
+            self.backoff()
+            raise ModelBusy("AI 호출 한도를 넘었습니다.", self.quota_backoff) from error
+        finally:
+            self.release()
+
+    def queue_depth(self, kind=None):
+        """기다리고 있는 호출 수를 반환합니다. kind 를 주면 그 종류만 셉니다."""
+        with self._cond:
+            return sum(1 for t in self._queue if kind is None or t.kind == kind)
+
+    def stats(self):
+        """대기열 길이, 실행 중인 호출 수, 종류별 대기 시간(평균/최대, 초)과 누적 횟수를 반환합니다."""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            kinds = {}
+            for kind in sorted(set(self.priorities) | set(self._waits)):
+                waits = self._waits.get(kind, ())
+                kinds[kind] = {
+                    "priority": self.priorities.get(kind),
+                    "waiting": sum(1 for t in self._queue if t.kind == kind),
+                    "oldest_wait": max((now - t.enqueued for t in self._queue if t.kind == kind), default=0.0),
+                    "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                    "max_wait": max(waits, default=0.0),
+                }
+            return {
+                "waiting": len(self._queue),
+                "active": self._active,
+                "max_concurrent": self.max_concurrent,
+                "tokens": self._tokens,
+                "rate_per_minute": self.rate * 60,
+                "paused_for": max(0.0, self._blocked_until - now),
+                "kinds": kinds,
+                **self._counts,
+            }
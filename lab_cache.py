@@ -0,0 +1,126 @@
+"""
+산-염기 실험실 분류 캐시
+AI에게 물어본 용액 분류(산성/염기성/중성)를 SQLite 파일(classify_cache.db)에 저장해서
+앱을 다시 켜도, 여러 프로세스로 실행해도 같은 용액은 AI에게 한 번만 묻도록 합니다.
+
+- 용액 이름은 공백/유니코드/자모를 정리한 이름(lab_resolver.normalize_name)으로 찾습니다.
+- 저장한 지 CACHE_TTL_DAYS 일이 지난 답은 다시 묻습니다.
+- CACHE_MAX_ENTRIES 개를 넘으면 가장 오래 쓰지 않은 것부터 지웁니다. (LRU)
+- 적중/실패 횟수도 파일에 저장되어 모든 프로세스의 적중률을 함께 셉니다.
+"""
+import os
+import time
+import sqlite3
+import threading
+
+from lab_resolver import normalize_name
+
+CACHE_TTL_DAYS = float(os.environ.get("LAB_CACHE_TTL_DAYS", "90") or 90)
+CACHE_MAX_ENTRIES = int(os.environ.get("LAB_CACHE_MAX_ENTRIES", "5000") or 5000)
+
+
+class ClassificationCache:
+    """SQLite에 저장되는 용액 분류 캐시 (TTL + 크기 제한 LRU)"""
+
+    def __init__(self, path, ttl_days=CACHE_TTL_DAYS, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS classifications (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_classifications_last_used ON classifications(last_used);
+                CREATE TABLE IF NOT EXISTS counters (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                ) WITHOUT ROWID;
+            """)
+
+    def _count(self, name):
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,)
+        )
+
+    def get(self, name):
+        """저장된 분류를 반환합니다. 없거나 오래된 답이면 None을 반환합니다."""
+        key = normalize_name(name)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM classifications WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM classifications WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._count("misses")
+                return None
+            self._conn.execute("UPDATE classifications SET last_used = ? WHERE key = ?", (now, key))
+            self._count("hits")
+            return row[0]
+
+    def peek(self, name):
+        """get 과 같지만 적중/실패 횟수와 마지막 사용 시각을 바꾸지 않습니다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM classifications WHERE key = ? AND created_at >= ?",
+                (normalize_name(name), time.time() - self.ttl)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, name, value):
+        """분류를 저장하고, 개수가 넘치면 가장 오래 쓰지 않은 것부터 지웁니다."""
+        key = normalize_name(name)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM classifications WHERE key IN "
+                    "(SELECT key FROM classifications ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+
+    def entries(self):
+        """저장된 (용액 이름, 분류) 목록을 최근에 쓴 순서로 반환합니다. 오래된 답은 뺍니다."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT key, value FROM classifications WHERE created_at >= ? ORDER BY last_used DESC",
+                (time.time() - self.ttl,)
+            ).fetchall()
+
+    def stats(self):
+        """적중/실패 횟수, 적중률, 저장된 개수를 반환합니다."""
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+            size = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": size,
+        }
+
+    def clear(self):
+        """저장된 분류와 횟수를 모두 지웁니다."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM classifications")
+            self._conn.execute("DELETE FROM counters")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
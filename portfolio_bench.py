@@ -0,0 +1,361 @@
+"""
+교사 포트폴리오 규모별 성능 측정
+가짜 자료를 1천 / 1만 / 10만 / 100만 개 만든 뒤, Streamlit AppTest 로 teacher_portfolio.py 를 화면 없이 실행해
+탭별 조작(다시 실행) 지연 시간의 p50/p99, 최대 메모리(RSS), 메타데이터 읽기/쓰기 시간을 잽니다.
+결과는 JSON 파일로 저장하므로 버전끼리 비교할 수 있습니다.
+
+    python portfolio_bench.py                          # 1천/1만/10만/100만 개 모두 측정
+    python portfolio_bench.py --sizes 1000 10000 --repeat 30 --output bench_results/new.json
+    python portfolio_bench.py compare bench_results/old.json bench_results/new.json
+
+- 가짜 자료는 bench_data/<저장 방식>_<자료 수>/teacher_data 에 만들고, 같은 설정이면 다음 측정 때 다시 씁니다.
+  (검색/추천 색인과 교육과정 트리, 본문 저장소도 미리 채워 두어 앱이 처음 실행될 때 다시 만들지 않습니다.
+  추천 색인 계산 때문에 처음 만들 때는 오래 걸리며, 100만 개는 몇 시간이 걸릴 수 있습니다.)
+- 자료 수마다 별도 프로세스에서 측정하므로 최대 메모리가 서로 섞이지 않습니다.
+  가짜 자료 만들기도 그 전에 다른 프로세스에서 하므로, 처음 만들 때와 다시 쓸 때의 최대 메모리가 같은 기준입니다.
+- 환경 변수 PORTFOLIO_BACKEND=json 을 주면 JSON 저장 방식을 측정합니다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import resource
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+
+SIZES = (1000, 10000, 100000, 1000000)
+REPEAT = 20
+SEED = 42
+BATCH = 10000
+BENCH_DIR = "bench_data"
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "teacher_portfolio.py")
+
+SUBJECTS = {"국어": 18, "수학": 18, "사회": 10, "과학": 14, "영어": 10,
+            "체육": 6, "음악": 6, "미술": 6, "도덕": 4, "기타": 8}
+GRADE_GROUPS = {"1-2학년": 2, "3-4학년": 3, "5-6학년": 3, "중학교": 1, "고등학교": 1}
+AREAS = ["듣기", "말하기", "읽기", "쓰기", "수와 연산", "도형", "측정", "자료와 가능성", "기타"]
+FILE_TYPES = {"pdf": 40, "docx": 15, "pptx": 20, "hwp": 10, "jpg": 6, "png": 4, "mp4": 3, "mp3": 2}
+BASE_KEYWORDS = [
+    "분수", "소수", "곱셈", "나눗셈", "도형", "각도", "넓이", "부피", "그래프", "비율", "확률", "통계",
+    "가족", "감사", "소중함", "친구", "배려", "존중", "환경", "에너지", "식물", "동물", "날씨", "물의 순환",
+    "산과 염기", "전기", "자석", "지도", "역사", "문화", "경제", "인권", "민주주의", "독서", "토론", "발표",
+    "글쓰기", "시", "이야기", "문법", "어휘", "리듬", "합창", "감상", "그리기", "만들기", "협동", "건강",
+]
+SEARCH_TERMS = ["분수", "학습지", "산과 염기", "가족 감사", "그래프"]
+
+
+# --- 가짜 자료 생성 ---
+
+def _keyword_vocabulary(rng, size=5000):
+    """실제처럼 몇몇 키워드는 아주 자주, 대부분은 드물게 쓰이도록 지프(Zipf) 분포 가중치를 붙입니다."""
+    words = list(BASE_KEYWORDS)
+    while len(words) < size:
+        words.append(f"{rng.choice(BASE_KEYWORDS)}{len(words)}")
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(len(words))]
+    return words, weights
+
+
+def generate_items(count, seed=SEED):
+    """가짜 자료를 한 건씩 만들어 돌려줍니다."""
+    rng = random.Random(seed)
+    words, weights = _keyword_vocabulary(rng)
+    subjects, subject_weights = list(SUBJECTS), list(SUBJECTS.values())
+    grades, grade_weights = list(GRADE_GROUPS), list(GRADE_GROUPS.values())
+    types, type_weights = list(FILE_TYPES), list(FILE_TYPES.values())
+    start = datetime(2024, 3, 1)
+    for i in range(count):
+        keywords = sorted(set(rng.choices(words, weights, k=rng.randint(1, 5))))
+        unit_no = rng.randint(1, 12)
+        ext = rng.choices(types, type_weights)[0]
+        uploaded = start + timedelta(seconds=rng.randint(0, 2 * 365 * 24 * 3600))
+        title = f"{keywords[0]} {rng.choice(['학습지', '활동지', '수업 자료', '평가지', '발표 자료'])} {i}"
+        yield {
+            "id": f"{uploaded.strftime('%Y%m%d_%H%M%S')}_{i:08x}_{title}.{ext}",
+            "original_name": f"{title}.{ext}",
+            "title": title,
+            "subject": rng.choices(subjects, subject_weights)[0],
+            "grade_group": rng.choices(grades, grade_weights)[0],
+            "area": rng.choice(AREAS),
+            "unit": f"{unit_no}. {rng.choice(BASE_KEYWORDS)}",
+            "lesson": f"{rng.randint(1, 8)}차시",
+            "description": f"{', '.join(keywords)}에 대한 {rng.choice(['활동', '수업', '평가'])} 자료입니다.",
+            "keywords": keywords,
+            "upload_date": uploaded.strftime("%Y-%m-%d %H:%M:%S"),
+            "file_size": int(rng.lognormvariate(13, 1.5)),
+            "file_type": "application/octet-stream",
+            "blob": f"{rng.getrandbits(128):032x}.{ext}",
+        }
+
+
+def _batches(items, size=BATCH):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def prepare_portfolio(count, root=BENCH_DIR, seed=SEED, log=print):
+    """가짜 포트폴리오를 만들고 그 작업 폴더를 반환합니다. 같은 설정으로 만든 것이 있으면 그대로 씁니다."""
+    from portfolio_store import open_store, DEFAULT_BACKEND
+    from portfolio_search import SearchIndex
+    from portfolio_recommend import RecommendationIndex
+    from portfolio_tree import CurriculumTree
+    from portfolio_extract import TextStore, can_extract
+
+    work_dir = os.path.abspath(os.path.join(root, f"{DEFAULT_BACKEND}_{count}"))
+    data_dir = os.path.join(work_dir, "teacher_data")
+    marker_path = os.path.join(work_dir, "bench.json")
+    marker = {"count": count, "seed": seed, "backend": DEFAULT_BACKEND}
+    if os.path.exists(marker_path):
+        with open(marker_path, encoding="utf-8") as f:
+            if json.load(f) == marker:
+                return work_dir
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(os.path.join(data_dir, "files"))
+
+    log(f"🛠️ 가짜 자료 {count}개를 만드는 중... ({work_dir})")
+    started = time.perf_counter()
+    store = open_store(data_dir)
+    search_index = SearchIndex(os.path.join(data_dir, "search.db"))
+    recommend_index = RecommendationIndex(os.path.join(data_dir, "recommend.db"))
+    tree = CurriculumTree(os.path.join(data_dir, "tree.db"))
+    text_store = TextStore(os.path.join(data_dir, "texts.db"))
+    for batch in _batches(generate_items(count, seed)):
+        store.add_many(batch)
+        search_index.add_many(batch)
+        recommend_index.add_many(batch)
+        tree.add_many(batch)
+        # 본문 추출은 끝난 상태로 가정 (실제 파일이 없으므로)
+        for item in batch:
+            if can_extract(item["blob"]):
+                text_store.put(item["blob"], "")
+    # 색인이 저장소와 맞는다고 기록 (앱이 처음 실행될 때 다시 만들지 않도록)
+    version = store.version()
+    for index in (search_index, recommend_index, tree):
+        index.mark_synced(version)
+        index.close()
+    store.close()
+    with open(marker_path, "w", encoding="utf-8") as f:
+        json.dump(marker, f)
+    log(f"   {time.perf_counter() - started:.1f}초 걸림")
+    return work_dir
+
+
+# --- 측정 ---
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))]
+
+
+def _summary(seconds):
+    ms = [value * 1000 for value in seconds]
+    return {"p50_ms": round(_percentile(ms, 50), 3), "p99_ms": round(_percentile(ms, 99), 3),
+            "mean_ms": round(statistics.fmean(ms), 3), "runs": len(ms)}
+
+
+def _peak_rss_mb():
+    # 리눅스는 KB, macOS 는 바이트 단위
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure_store(data_dir, repeat):
+    """메타데이터 읽기(열기 + 전체 읽기)와 쓰기(한 건 추가/삭제) 시간을 잽니다."""
+    from portfolio_store import open_store
+
+    load, save = [], []
+    for i in range(max(3, repeat // 4)):
+        started = time.perf_counter()
+        store = open_store(data_dir)
+        store.all()
+        load.append(time.perf_counter() - started)
+        store.close()
+    store = open_store(data_dir)
+    item = next(generate_items(1, seed=-1))
+    for i in range(repeat):
+        item = dict(item, id=f"bench_{i}")
+        started = time.perf_counter()
+        store.add(item)
+        save.append(time.perf_counter() - started)
+        store.remove(item["id"])
+    store.close()
+    return {"load": _summary(load), "save": _summary(save)}
+
+
+def _scenarios(at):
+    """탭별로 다시 실행을 일으키는 조작 목록 {이름: 조작 함수}"""
+    def list_tab(i):
+        # 자료 목록: 과목 필터와 정렬 기준 바꾸기
+        at.selectbox(key="filter_subject").set_value(["전체", "수학", "국어"][i % 3])
+        sort = at.tabs[1].selectbox[0]
+        sort.set_value(sort.options[i % len(sort.options)])
+
+    def search_tab(i):
+        # 자료 목록: 검색어 입력
+        at.sidebar.text_input[0].set_value(SEARCH_TERMS[i % len(SEARCH_TERMS)])
+
+    def stats_tab(i):
+        # 통계: 학년군 필터 바꾸기 (필터가 있으면 표에서 바로 집계)
+        at.selectbox(key="filter_grade").set_value(["전체", "3-4학년", "5-6학년"][i % 3])
+
+    def tree_tab(i):
+        # 교육과정 탐색: 한 단계 들어가거나 처음으로 돌아가기
+        buttons = at.tabs[3].button
+        (buttons[-1] if i % 2 == 0 and len(buttons) > 1 else buttons[0]).click()
+
+    def reset():
+        at.sidebar.text_input[0].set_value("")
+        at.selectbox(key="filter_subject").set_value("전체")
+        at.selectbox(key="filter_grade").set_value("전체")
+
+    return {"목록": list_tab, "검색": search_tab, "통계": stats_tab, "탐색": tree_tab}, reset
+
+
+def measure_app(work_dir, repeat, timeout):
+    """앱을 화면 없이 실행해 첫 실행 시간과 탭별 다시 실행 시간을 잽니다."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(work_dir)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    started = time.perf_counter()
+    at.run()
+    startup = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+
+    scenarios, reset = _scenarios(at)
+    tabs = {}
+    for name, action in scenarios.items():
+        timings = []
+        for i in range(repeat):
+            action(i)
+            started = time.perf_counter()
+            at.run()
+            timings.append(time.perf_counter() - started)
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception[0].message}")
+        tabs[name] = _summary(timings)
+        reset()
+        at.run()
+    return {"startup_ms": round(startup * 1000, 3), "tabs": tabs}
+
+
+def run_one(count, repeat, timeout, root):
+    """(별도 프로세스) 자료 수 하나를 측정해 결과 dict를 반환합니다.
+    가짜 자료는 run_suite 가 미리 다른 프로세스에서 만들어 둡니다. (없으면 여기서 만들지만 최대 메모리에 섞임)"""
+    work_dir = prepare_portfolio(count, root, log=lambda message: print(message, file=sys.stderr))
+    result = {"records": count}
+    result["metadata"] = measure_store(os.path.join(work_dir, "teacher_data"), repeat)
+    result.update(measure_app(work_dir, repeat, timeout))
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(APP_PATH), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_suite(sizes, repeat, timeout, root, output):
+    """자료 수마다 별도 프로세스에서 측정하고 결과를 JSON 파일로 저장합니다."""
+    from portfolio_store import DEFAULT_BACKEND
+
+    report = {
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": DEFAULT_BACKEND,
+        "repeat": repeat,
+        "results": [],
+    }
+    for count in sizes:
+        # 가짜 자료 만들기는 따로 실행 (만드는 동안 쓴 메모리가 측정 프로세스의 최대 메모리에 들어가지 않도록)
+        prepared = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "prepare", str(count), "--root", os.path.abspath(root)],
+            cwd=os.path.dirname(APP_PATH)
+        )
+        if prepared.returncode:
+            report["results"].append({"records": count, "error": ["가짜 자료를 만들지 못했습니다."]})
+            continue
+        print(f"📏 자료 {count}개 측정 중...")
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "run-one", str(count),
+             "--repeat", str(repeat), "--timeout", str(timeout), "--root", os.path.abspath(root)],
+            capture_output=True, text=True, cwd=os.path.dirname(APP_PATH)
+        )
+        sys.stderr.write(completed.stderr[-2000:] if completed.returncode else "")
+        if completed.returncode:
+            report["results"].append({"records": count, "error": completed.stderr.strip().splitlines()[-1:]})
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        report["results"].append(result)
+        tabs = ", ".join(f"{name} {t['p50_ms']:.0f}/{t['p99_ms']:.0f}ms" for name, t in result["tabs"].items())
+        print(f"   첫 실행 {result['startup_ms']:.0f}ms, 탭 p50/p99: {tabs}, 최대 메모리 {result['peak_rss_mb']}MB")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ 결과를 저장했습니다: {output}")
+    return report
+
+
+def compare(old_path, new_path):
+    """두 결과 파일의 p50/p99 를 나란히 보여줍니다. (비율이 1보다 크면 느려진 것)"""
+    with open(old_path, encoding="utf-8") as f:
+        old = {r["records"]: r for r in json.load(f)["results"] if "error" not in r}
+    with open(new_path, encoding="utf-8") as f:
+        new = {r["records"]: r for r in json.load(f)["results"] if "error" not in r}
+    for count in sorted(set(old) & set(new)):
+        print(f"📏 자료 {count}개")
+        rows = [("첫 실행", old[count]["startup_ms"], new[count]["startup_ms"]),
+                ("최대 메모리(MB)", old[count]["peak_rss_mb"], new[count]["peak_rss_mb"])]
+        for name in new[count]["tabs"]:
+            if name in old[count]["tabs"]:
+                for key in ("p50_ms", "p99_ms"):
+                    rows.append((f"{name} {key}", old[count]["tabs"][name][key], new[count]["tabs"][name][key]))
+        for kind in ("load", "save"):
+            rows.append((f"메타데이터 {kind} p50_ms",
+                         old[count]["metadata"][kind]["p50_ms"], new[count]["metadata"][kind]["p50_ms"]))
+        for label, before, after in rows:
+            ratio = after / before if before else float("inf")
+            print(f"   {label:<24} {before:>10.1f} → {after:>10.1f}  (×{ratio:.2f})")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "compare":
+        if len(sys.argv) != 4:
+            print("사용법: python portfolio_bench.py compare 이전결과.json 새결과.json")
+            sys.exit(1)
+        compare(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="가짜 자료로 교사 포트폴리오 앱의 규모별 성능을 잽니다.")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "run-one", "prepare"])
+    parser.add_argument("count", nargs="?", type=int, help="(run-one, prepare) 측정할 자료 수")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="측정할 자료 수 목록")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="조작마다 반복 횟수 (기본: 20)")
+    parser.add_argument("--timeout", type=float, default=1800, help="앱 한 번 실행의 최대 시간(초)")
+    parser.add_argument("--root", default=BENCH_DIR, help="가짜 자료를 만들 폴더 (기본: bench_data)")
+    parser.add_argument("--output", default=os.path.join("bench_results", f"{datetime.now():%Y%m%d_%H%M%S}.json"),
+                        help="결과 JSON 파일 경로")
+    args = parser.parse_args()
+    if args.command == "prepare":
+        prepare_portfolio(args.count, args.root)
+    elif args.command == "run-one":
+        print(json.dumps(run_one(args.count, args.repeat, args.timeout, args.root), ensure_ascii=False))
+    else:
+        run_suite(args.sizes, args.repeat, args.timeout, args.root, args.output)
@@ -0,0 +1,220 @@
+"""
+교사 포트폴리오 문서 본문 추출
+업로드한 PDF, Word(docx), PowerPoint(pptx) 파일에서 글자를 뽑아 검색 색인에 넣습니다.
+추출은 별도 작업 프로세스에서 파일(blob)마다 한 번만 하고, 결과는 압축해서 teacher_data/texts.db 에 저장합니다.
+
+- docx, pptx: 추가 설치 없이 추출
+- pdf: PyMuPDF(pip install pymupdf) 또는 pypdf(pip install pypdf)가 있을 때 추출
+"""
+import os
+import re
+import zlib
+import sqlite3
+import zipfile
+import threading
+import multiprocessing
+from xml.etree import ElementTree
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from portfolio_files import local_blob
+
+try:
+    import fitz  # PyMuPDF (선택)
+except ImportError:
+    fitz = None
+
+try:
+    import pypdf  # (선택)
+except ImportError:
+    pypdf = None
+
+MAX_WORKERS = 2
+
+_SLIDE_RE = re.compile(r"ppt/slides/slide(\d+)\.xml$")
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+
+
+def _xml_text(data, paragraph_tag, text_tag):
+    root = ElementTree.fromstring(data)
+    paragraphs = []
+    for paragraph in root.iter(paragraph_tag):
+        text = "".join(node.text or "" for node in paragraph.iter(text_tag))
+        if text.strip():
+            paragraphs.append(text)
+    return "\n".join(paragraphs)
+
+
+def _docx_text(path):
+    with zipfile.ZipFile(path) as z:
+        return _xml_text(z.read("word/document.xml"), _W_NS + "p", _W_NS + "t")
+
+
+def _pptx_text(path):
+    with zipfile.ZipFile(path) as z:
+        slides = sorted((int(m.group(1)), name) for name in z.namelist() if (m := _SLIDE_RE.match(name)))
+        return "\n".join(_xml_text(z.read(name), _A_NS + "p", _A_NS + "t") for _, name in slides)
+
+
+def _pdf_text(path):
+    if fitz is not None:
+        with fitz.open(path) as doc:
+            return "\n".join(page.get_text() for page in doc)
+    if pypdf is not None:
+        reader = pypdf.PdfReader(path)
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    return None
+
+
+def extract_text(path):
+    """(프로세스 작업) 파일에서 본문 글자를 뽑습니다. 지원하지 않는 형식이면 None을 반환합니다."""
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext == ".docx":
+            return _docx_text(path)
+        if ext == ".pptx":
+            return _pptx_text(path)
+        if ext == ".pdf":
+            return _pdf_text(path)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile, ElementTree.ParseError):
+        return ""
+    return None
+
+
+def extract_blob(files_dir, blob):
+    """(프로세스 작업) blob의 본문을 뽑습니다. 읽는 도중 나눈 폴더로 옮겨지거나 압축되었으면 새 위치에서 다시 읽습니다."""
+    with local_blob(files_dir, blob) as path:
+        text = extract_text(path)
+        moved = not text and not os.path.exists(path)
+    if moved:
+        with local_blob(files_dir, blob) as path:
+            text = extract_text(path)
+    return text
+
+
+def can_extract(file_name):
+    """본문을 추출할 수 있는 형식인지 확인합니다."""
+    ext = os.path.splitext(file_name)[1].lower()
+    return ext in (".docx", ".pptx") or (ext == ".pdf" and (fitz is not None or pypdf is not None))
+
+
+class TextStore:
+    """추출한 본문을 파일(blob)별로 압축해 저장하는 곳"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS texts (
+                    blob TEXT PRIMARY KEY,
+                    body BLOB NOT NULL
+                ) WITHOUT ROWID
+            """)
+
+    def has(self, blob):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM texts WHERE blob = ?", (blob,)).fetchone() is not None
+
+    def get(self, blob):
+        """저장된 본문을 반환합니다. 없으면 빈 문자열입니다."""
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM texts WHERE blob = ?", (blob,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else ""
+
+    def put(self, blob, text):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO texts (blob, body) VALUES (?, ?)",
+                (blob, zlib.compress((text or "").encode("utf-8"), 6))
+            )
+
+    def remove(self, blob):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM texts WHERE blob = ?", (blob,))
+
+
+class TextExtractor:
+    """본문 추출을 작업 프로세스에 맡기고, 끝나면 저장한 뒤 on_done(blob, text)을 부릅니다."""
+
+    def __init__(self, files_dir, text_store, on_done=None, max_workers=MAX_WORKERS):
+        self.files_dir = files_dir
+        self.text_store = text_store
+        self.on_done = on_done
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+        self._pending = set()
+
+    def _new_pool(self):
+        # fork 대신 spawn: 웹 서버의 스레드와 자물쇠를 물려받지 않은 깨끗한 프로세스에서 추출
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _restart_pool(self, broken):
+        """망가진 작업 풀을 새로 만듭니다. (다른 스레드가 이미 바꿨으면 그대로 둠)"""
+        with self._lock:
+            if self._pool is broken:
+                broken.shutdown(wait=False)
+                self._pool = self._new_pool()
+
+    def _submit_extract(self, blob):
+        pool = self._pool
+        try:
+            return pool.submit(extract_blob, self.files_dir, blob)
+        except (BrokenProcessPool, RuntimeError):
+            # 작업 프로세스가 비정상 종료되면 풀 전체가 망가지므로 새로 만들어 한 번 더 시도
+            self._restart_pool(pool)
+            return self._pool.submit(extract_blob, self.files_dir, blob)
+
+    def _finish(self, blob, future):
+        try:
+            text = future.result()
+        except BrokenProcessPool:
+            # 파일 탓이 아닐 수 있으므로 빈 본문으로 기록하지 않음 (풀은 다음 예약 때 새로 만들고, 이 파일은 앱을 다시 켤 때 다시 시도)
+            with self._lock:
+                self._pending.discard(blob)
+            return
+        except Exception:
+            text = ""
+        try:
+            # 추출에 실패해도 빈 본문을 저장해서 다시 시도하지 않음
+            self.text_store.put(blob, text or "")
+            if text and self.on_done is not None:
+                self.on_done(blob, text)
+        finally:
+            with self._lock:
+                self._pending.discard(blob)
+
+    def submit(self, blob):
+        """파일의 본문 추출을 예약합니다. 이미 추출했거나 예약된 파일은 건너뜁니다.
+        작업 프로세스를 띄우지 못하면 예외 대신 False를 반환합니다. (업로드는 그대로 끝남)"""
+        if not can_extract(blob) or self.text_store.has(blob):
+            return False
+        with self._lock:
+            if blob in self._pending:
+                return False
+            self._pending.add(blob)
+        try:
+            future = self._submit_extract(blob)
+        except (BrokenProcessPool, RuntimeError, OSError):
+            with self._lock:
+                self._pending.discard(blob)
+            return False
+        future.add_done_callback(lambda f: self._finish(blob, f))
+        return True
+
+    def backfill(self, blobs):
+        """아직 본문을 추출하지 않은 파일들을 백그라운드에서 찾아 예약합니다."""
+        def run():
+            for blob in blobs:
+                self.submit(blob)
+        threading.Thread(target=run, name="text-extract-backfill", daemon=True).start()
+
+    def pending(self):
+        """아직 추출 중인 파일 수를 반환합니다."""
+        with self._lock:
+            return len(self._pending)
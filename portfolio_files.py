@@ -0,0 +1,444 @@
+"""
+교사 포트폴리오 파일 전달
+업로드한 파일은 내용의 SHA-256 해시를 이름으로 저장해서 같은 파일은 한 번만 저장합니다.
+목록을 그릴 때는 파일을 읽지 않고, 사용자가 다운로드를 누를 때만 파일을 엽니다.
+큰 동영상/음성 파일은 별도의 작은 HTTP 서버가 조각(chunk) 단위로 보내서
+파일 전체를 파이썬 메모리에 올리지 않습니다.
+
+파일은 이름 앞 네 글자로 두 단계 하위 폴더에 나눠 저장합니다. (files/ab/cd/abcd....pdf)
+한 폴더에 파일이 수만 개 쌓이면 목록 보기, 백업, 존재 확인이 느려지기 때문입니다.
+예전처럼 files 폴더에 바로 들어 있는 파일도 그대로 찾을 수 있고, 앱을 켠 채로 조금씩 옮길 수 있습니다:
+    python portfolio_files.py shard [teacher_data/files] [--batch 500] [--pause 0.1]
+
+오랫동안 내려받지 않은 파일은 portfolio_tiering 이 압축해서 보관합니다. (blob 이름 뒤에 .zst 또는 .gz)
+압축된 파일도 같은 이름으로 찾고, 내려받을 때 조각 단위로 풀면서 보냅니다.
+
+스트리밍 서버는 환경 변수로 켭니다:
+    PORTFOLIO_STREAM_PORT=8502            (설정하지 않으면 꺼짐)
+    PORTFOLIO_STREAM_HOST=127.0.0.1       (서버가 열릴 주소)
+    PORTFOLIO_STREAM_BASE_URL=http://...  (브라우저에서 접속할 주소, 기본값 http://localhost:포트)
+"""
+import os
+import re
+import sys
+import gzip
+import time
+import shutil
+import struct
+import hashlib
+import tempfile
+import threading
+import mimetypes
+from urllib.parse import quote, unquote, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from contextlib import contextmanager
+
+from app_metrics import section
+
+try:
+    import zstandard  # (선택) 압축 보관에 사용, 없으면 gzip
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 64 * 1024
+STREAM_EXTENSIONS = ("mp4", "mp3")
+
+STREAM_PORT = int(os.environ.get("PORTFOLIO_STREAM_PORT", "0"))
+STREAM_HOST = os.environ.get("PORTFOLIO_STREAM_HOST", "127.0.0.1")
+STREAM_BASE_URL = os.environ.get("PORTFOLIO_STREAM_BASE_URL", f"http://localhost:{STREAM_PORT}")
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+# blob 저장과 삭제가 엇갈리지 않도록 잠그는 자물쇠 (업로드 중인 blob을 다른 삭제가 지우지 않게)
+blob_lock = threading.RLock()
+
+# 내용 해시(sha256)로 지은 blob 이름 (뒤에 확장자가 붙을 수 있음)
+_BLOB_NAME_RE = re.compile(r"[0-9a-f]{64}(\..*)?")
+
+# 압축 보관된 blob 이름 뒤에 붙는 확장자
+COMPRESSED_SUFFIXES = (".zst", ".gz")
+
+
+def shard_path(root, name):
+    """파일 이름 앞 네 글자(해시)로 나눈 두 단계 하위 폴더 경로를 반환합니다.
+    이름이 해시가 아닌 예전 파일(20240101_120000_a.pdf 등)은 이름의 해시를 대신 씁니다."""
+    key = name[:4] if _BLOB_NAME_RE.fullmatch(name) else hashlib.sha1(name.encode("utf-8")).hexdigest()[:4]
+    return os.path.join(root, key[:2], key[2:], name)
+
+
+def resolve_path(root, name):
+    """파일이 실제로 있는 경로를 반환합니다. 나눈 폴더를 먼저 보고, 없으면 예전 위치(root 바로 아래)를 봅니다.
+    둘 다 없으면 새로 저장할 경로(나눈 폴더)를 반환합니다.
+    옮기기는 예전 위치 → 나눈 폴더 방향으로만 이름 바꾸기(원자적)로 하므로, 나눈 폴더를 한 번 더 보면 놓치지 않습니다."""
+    new_path = shard_path(root, name)
+    if os.path.exists(new_path):
+        return new_path
+    old_path = os.path.join(root, name)
+    if os.path.exists(old_path):
+        return old_path
+    return new_path
+
+
+def _blob_candidates(files_dir, name):
+    # 압축은 "압축 파일 쓰기 → 원본 삭제", 나누기는 "예전 위치 → 나눈 폴더" 순서로만 일어나므로
+    # 이 순서로 찾으면 옮기는 중인 파일도 놓치지 않음
+    new_path = shard_path(files_dir, name)
+    return ([new_path, os.path.join(files_dir, name)]
+            + [new_path + suffix for suffix in COMPRESSED_SUFFIXES] + [new_path])
+
+
+def blob_path(files_dir, name):
+    """blob(또는 예전 방식 파일)의 실제 경로를 반환합니다. 압축 보관 중이면 압축 파일 경로입니다."""
+    candidates = _blob_candidates(files_dir, name)
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return candidates[0]
+
+
+def is_compressed(path):
+    return path.endswith(COMPRESSED_SUFFIXES)
+
+
+def open_blob(files_dir, name):
+    """blob을 읽기용으로 엽니다. 압축 보관 중이면 읽으면서 풀어 주는 파일 객체를 돌려줍니다."""
+    for path in _blob_candidates(files_dir, name):
+        try:
+            if path.endswith(".gz"):
+                return gzip.open(path, "rb")
+            if path.endswith(".zst"):
+                if zstandard is None:
+                    if not os.path.exists(path):
+                        continue
+                    raise RuntimeError("zstd로 압축된 파일을 열려면 zstandard 패키지가 필요합니다: pip install zstandard")
+                return zstandard.open(path, "rb")
+            return open(path, "rb")
+        except FileNotFoundError:
+            continue
+    raise FileNotFoundError(name)
+
+
+def blob_size(files_dir, name):
+    """blob의 원래(압축을 푼) 크기를 반환합니다."""
+    for path in _blob_candidates(files_dir, name):
+        try:
+            if path.endswith(".gz"):
+                # gzip 끝 4바이트에 원래 크기가 들어 있음 (4GB 미만 파일)
+                with open(path, "rb") as f:
+                    f.seek(-4, os.SEEK_END)
+                    return struct.unpack("<I", f.read(4))[0]
+            if path.endswith(".zst"):
+                with open(path, "rb") as f:
+                    return zstandard.frame_content_size(f.read(18))
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            continue
+    raise FileNotFoundError(name)
+
+
+def physical_size(files_dir, name):
+    """blob이 실제로 디스크에서 차지하는 크기를 반환합니다. 없으면 0입니다."""
+    for path in _blob_candidates(files_dir, name):
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            continue
+    return 0
+
+
+@contextmanager
+def local_blob(files_dir, name):
+    """압축을 푼 실제 파일 경로가 필요한 작업(본문 추출, 미리보기)용으로 경로를 빌려줍니다.
+    압축 보관 중이면 임시 파일로 풀었다가 끝나면 지웁니다."""
+    path = blob_path(files_dir, name)
+    if not is_compressed(path):
+        yield path
+        return
+    fd, tmp_path = tempfile.mkstemp(dir=files_dir, prefix=".restore-", suffix=os.path.splitext(name)[1])
+    try:
+        with os.fdopen(fd, "wb") as dest, open_blob(files_dir, name) as src:
+            shutil.copyfileobj(src, dest, CHUNK_SIZE)
+        yield tmp_path
+    finally:
+        os.remove(tmp_path)
+
+
+def compress_blob(files_dir, name, min_saving=0.05):
+    """blob을 압축해서 보관합니다. (zstandard 가 있으면 zstd, 없으면 gzip)
+    압축해도 min_saving 비율만큼 줄지 않으면 원본을 그대로 두고 None을, 압축했으면 압축 후 크기를 반환합니다."""
+    src_path = blob_path(files_dir, name)
+    if is_compressed(src_path):
+        return os.path.getsize(src_path)
+    suffix = ".zst" if zstandard is not None else ".gz"
+    dest_path = shard_path(files_dir, name) + suffix
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dest_path), prefix=".compress-", suffix=".tmp")
+    try:
+        size = os.path.getsize(src_path)
+        with os.fdopen(fd, "wb") as raw, open(src_path, "rb") as src:
+            if zstandard is not None:
+                zstandard.ZstdCompressor(level=10).copy_stream(src, raw, size=size)
+            else:
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) as dest:
+                    shutil.copyfileobj(src, dest, CHUNK_SIZE)
+        compressed = os.path.getsize(tmp_path)
+        if compressed > size * (1 - min_saving):
+            os.remove(tmp_path)
+            return None
+        with blob_lock:
+            if not os.path.exists(src_path):
+                # 압축하는 사이에 삭제됨
+                os.remove(tmp_path)
+                return None
+            os.replace(tmp_path, dest_path)
+            os.remove(src_path)
+        return compressed
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_blob(files_dir, name):
+    """blob을 어느 위치에 있든(압축 보관 포함) 지웁니다. 지웠으면 True를 반환합니다."""
+    removed = False
+    for path in _blob_candidates(files_dir, name):
+        try:
+            os.remove(path)
+            removed = True
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def store_blob(src, files_dir, file_name):
+    """업로드 파일을 조각 단위로 쓰면서 해시를 계산하고, 해시 이름(blob)으로 저장합니다.
+    같은 내용의 blob이 이미 있으면 새로 저장하지 않습니다. (blob 이름, 크기)를 반환합니다."""
+    ext = os.path.splitext(file_name)[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=files_dir, prefix=".upload-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            src.seek(0)
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        blob = digest.hexdigest() + ext
+        with blob_lock:
+            if os.path.exists(blob_path(files_dir, blob)):
+                os.remove(tmp_path)
+            else:
+                new_path = shard_path(files_dir, blob)
+                os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                os.replace(tmp_path, new_path)
+        return blob, size
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def item_file_name(item):
+    """자료의 실제 파일 이름을 반환합니다. (이전 방식으로 올린 자료는 id가 파일 이름)"""
+    return item.get("blob") or item["id"]
+
+
+def iter_file_chunks(f, start=0, end=None, chunk_size=CHUNK_SIZE):
+    """열린 파일 f를 start부터 end(포함)까지 chunk_size 단위로 읽어 돌려줍니다.
+    (압축 파일 객체는 앞으로 읽어 나가며 start까지 건너뜁니다.)"""
+    f.seek(start)
+    remaining = None if end is None else end - start + 1
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        chunk = f.read(size)
+        if not chunk:
+            break
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield chunk
+
+
+def lazy_file_reader(files_dir, name, on_read=None):
+    """다운로드 버튼을 누를 때만 파일을 여는 함수를 만듭니다. (st.download_button 의 data 용)
+    파일 위치는 누를 때 찾으므로 그 사이에 나눈 폴더로 옮겨지거나 압축되어도 괜찮습니다.
+    on_read(name) 은 실제로 읽었을 때 불립니다. (접근 기록용)"""
+    def read():
+        for _ in range(2):
+            try:
+                with section("files.download_read"), open_blob(files_dir, name) as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            if on_read is not None:
+                on_read(name)
+            return data
+        return b""
+    return read
+
+
+def should_stream(file_name):
+    """별도 스트리밍 서버로 보낼 큰 미디어 파일인지 확인합니다."""
+    return STREAM_PORT > 0 and file_name.rsplit(".", 1)[-1].lower() in STREAM_EXTENSIONS
+
+
+def should_stream_compressed(files_dir, name):
+    """압축 보관 중이라 스트리밍 서버로 풀면서 보낼 파일인지 확인합니다.
+    (다운로드 버튼은 파일 전체를 메모리에 풀어야 하므로 서버가 켜져 있으면 서버로 보냄)"""
+    return STREAM_PORT > 0 and is_compressed(blob_path(files_dir, name))
+
+
+def stream_url(file_id, download_name=None):
+    """스트리밍 서버에서 파일을 받을 수 있는 주소를 만듭니다.
+    download_name 을 주면 브라우저가 그 이름으로 내려받습니다. (재생하지 않음)"""
+    url = f"{STREAM_BASE_URL.rstrip('/')}/{quote(file_id)}"
+    return f"{url}?download={quote(download_name)}" if download_name else url
+
+
+class _FileStreamHandler(BaseHTTPRequestHandler):
+    """files 폴더의 파일만 조각 단위로 보내는 요청 처리기 (Range 요청 지원)"""
+
+    files_dir = None
+    on_access = None
+
+    def _resolve(self):
+        file_id = unquote(self.path.split("?", 1)[0].lstrip("/"))
+        if not file_id or os.path.basename(file_id) != file_id:
+            return None
+        return file_id if os.path.isfile(blob_path(self.files_dir, file_id)) else None
+
+    def _send(self, with_body):
+        file_id = self._resolve()
+        if file_id is None:
+            self.send_error(404)
+            return
+        try:
+            # 압축 보관 중인 파일은 원래 크기를 알려주고 보낼 때 풀어서 보냄
+            size = blob_size(self.files_dir, file_id)
+        except FileNotFoundError:
+            self.send_error(404)
+            return
+        start, end = 0, size - 1
+        match = _RANGE_RE.fullmatch(self.headers.get("Range", "").strip())
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(size - int(match.group(2)), 0)
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(file_id)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        download_name = parse_qs(self.path.partition("?")[2]).get("download")
+        if download_name:
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(download_name[0])}")
+        self.end_headers()
+        if with_body and size:
+            if start == 0 and self.on_access is not None:
+                # 이어받기(Range) 요청마다 세지 않도록 처음부터 받을 때만 기록
+                self.on_access(file_id)
+            with open_blob(self.files_dir, file_id) as f:
+                for chunk in iter_file_chunks(f, start, end):
+                    self.wfile.write(chunk)
+
+    def do_GET(self):
+        try:
+            self._send(with_body=True)
+        except (BrokenPipeError, ConnectionResetError):
+            # 사용자가 재생/다운로드를 중간에 멈춘 경우
+            pass
+
+    def do_HEAD(self):
+        self._send(with_body=False)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stream_server(files_dir, host=STREAM_HOST, port=STREAM_PORT, on_access=None):
+    """스트리밍 서버를 백그라운드 스레드로 시작합니다. 포트가 설정되지 않았으면 None을 반환합니다.
+    on_access(name) 은 파일을 처음부터 보낼 때 불립니다. (접근 기록용)"""
+    if port <= 0:
+        return None
+    handler = type("FileStreamHandler", (_FileStreamHandler,), {
+        "files_dir": os.path.abspath(files_dir),
+        "on_access": staticmethod(on_access) if on_access is not None else None,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="portfolio-stream-server", daemon=True).start()
+    return server
+
+
+def migrate_to_shards(files_dir, batch=500, pause=0.0, log=print):
+    """files 폴더(와 thumbs 폴더)에 바로 들어 있는 파일을 나눈 폴더로 옮깁니다. 옮긴 파일 수를 반환합니다.
+    batch 개마다 pause 초씩 쉬어서 앱이 켜져 있어도 디스크를 오래 붙잡지 않습니다.
+    중간에 멈춰도 다시 실행하면 남은 파일만 옮깁니다."""
+    moved = 0
+    for root in (files_dir, os.path.join(files_dir, "thumbs")):
+        if not os.path.isdir(root):
+            continue
+        with os.scandir(root) as entries:
+            names = [entry.name for entry in entries
+                     if entry.is_file(follow_symlinks=False) and not entry.name.startswith(".")]
+        for name in names:
+            old_path = os.path.join(root, name)
+            new_path = shard_path(root, name)
+            os.makedirs(os.path.dirname(new_path), exist_ok=True)
+            with blob_lock:
+                try:
+                    if os.path.exists(new_path):
+                        # 같은 내용이 이미 옮겨져 있음 (해시 이름이므로 내용이 같음)
+                        os.remove(old_path)
+                    else:
+                        os.rename(old_path, new_path)
+                except FileNotFoundError:
+                    # 그 사이에 앱에서 삭제됨
+                    continue
+            moved += 1
+            if moved % batch == 0:
+                log(f"  {moved}개 옮김...")
+                if pause:
+                    time.sleep(pause)
+    return moved
+
+
+def count_unsharded(files_dir):
+    """아직 나눈 폴더로 옮기지 않은 파일 수를 반환합니다."""
+    count = 0
+    for root in (files_dir, os.path.join(files_dir, "thumbs")):
+        if os.path.isdir(root):
+            with os.scandir(root) as entries:
+                count += sum(1 for entry in entries
+                             if entry.is_file(follow_symlinks=False) and not entry.name.startswith("."))
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="files 폴더의 파일을 두 단계 하위 폴더로 나눠 옮깁니다.")
+    parser.add_argument("command", choices=["shard", "status"])
+    parser.add_argument("files_dir", nargs="?", default=os.path.join("teacher_data", "files"))
+    parser.add_argument("--batch", type=int, default=500, help="몇 개마다 쉴지 (기본: 500)")
+    parser.add_argument("--pause", type=float, default=0.1, help="쉬는 시간(초) (기본: 0.1)")
+    args = parser.parse_args()
+    if not os.path.isdir(args.files_dir):
+        print(f"❌ 폴더를 찾을 수 없습니다: {args.files_dir}")
+        sys.exit(1)
+    if args.command == "status":
+        print(f"아직 옮기지 않은 파일: {count_unsharded(args.files_dir)}개")
+    else:
+        moved = migrate_to_shards(args.files_dir, args.batch, args.pause)
+        print(f"✅ {moved}개의 파일을 옮겼습니다. (남은 파일 {count_unsharded(args.files_dir)}개)")
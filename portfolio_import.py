@@ -0,0 +1,184 @@
+"""
+교사 포트폴리오 일괄 가져오기
+과목/학년군/영역/단원/차시 폴더로 정리된 자료를 한꺼번에 포트폴리오에 넣습니다.
+
+    python portfolio_import.py 자료폴더 [--data-dir teacher_data] [--workers 4] [--dry-run]
+
+예) 자료폴더/수학/3-4학년/수와 연산/1. 분수/1차시/분수 학습지.pdf
+    → 과목=수학, 학년군=3-4학년, 영역=수와 연산, 단원=1. 분수, 차시=1차시, 제목=분수 학습지
+
+- 파일 해시 계산, 복사, 미리보기 생성, 문서 본문 추출은 여러 프로세스가 나눠서 동시에 처리합니다.
+- 메타데이터는 파일 500개마다 한 번의 트랜잭션으로 기록합니다. (검색/추천 색인, 교육과정 트리도 함께 갱신)
+- 이미 가져온 파일(같은 실제 경로)은 건너뛰므로 중간에 멈춰도 다시 실행하면 기록한 묶음 다음부터 이어서 진행됩니다.
+- 읽을 수 없는 파일이 있어도 나머지는 계속 가져오고, 실패한 파일은 마지막에 모아서 보여줍니다.
+  다른 폴더에 같은 구조로 놓인 다른 파일은 새로 가져옵니다.
+"""
+import os
+import sys
+import uuid
+import argparse
+import mimetypes
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from portfolio_store import open_store, DATA_DIR
+from portfolio_files import store_blob, local_blob
+from portfolio_search import SearchIndex
+from portfolio_recommend import RecommendationIndex
+from portfolio_tree import CurriculumTree
+from portfolio_tiering import BlobTiering
+from portfolio_thumbnails import generate_thumbnail, thumbnail_path
+from portfolio_extract import TextStore, extract_text, can_extract
+
+ALLOWED_EXTENSIONS = ('pdf', 'docx', 'pptx', 'hwp', 'jpg', 'png', 'mp4', 'mp3')
+
+# 폴더 단계별로 채울 필드
+PATH_FIELDS = ("subject", "grade_group", "area", "unit", "lesson")
+
+# 이 파일 수마다 메타데이터와 색인을 기록함
+CHUNK_SIZE = 500
+
+
+def find_files(root):
+    """root 아래의 가져올 수 있는 파일을 (상대 경로) 목록으로 반환합니다."""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.rsplit(".", 1)[-1].lower() in ALLOWED_EXTENSIONS:
+                found.append(os.path.relpath(os.path.join(dirpath, filename), root))
+    return found
+
+
+def infer_metadata(rel_path):
+    """상대 경로의 폴더 이름으로 과목/학년군/영역/단원/차시와 제목을 정합니다."""
+    parts = rel_path.replace("\\", "/").split("/")
+    folders, filename = parts[:-1], parts[-1]
+    fields = {field: (folders[i] if i < len(folders) else "") for i, field in enumerate(PATH_FIELDS)}
+    fields["subject"] = fields["subject"] or "기타"
+    fields["area"] = fields["area"] or "기타"
+    fields["title"] = os.path.splitext(filename)[0]
+    fields["original_name"] = filename
+    return fields
+
+
+def source_key(root, rel_path):
+    """이미 가져온 파일인지 확인할 때 쓰는 키 (가져온 폴더와 상관없이 같은 파일이면 같은 실제 경로)"""
+    return os.path.realpath(os.path.join(root, rel_path))
+
+
+def _copy_one(args):
+    """(프로세스 작업) 파일 하나의 해시를 계산하며 files 폴더로 복사하고 미리보기와 본문을 만듭니다."""
+    src_path, files_dir = args
+    with open(src_path, "rb") as f:
+        blob, size = store_blob(f, files_dir, os.path.basename(src_path))
+    thumb_path = thumbnail_path(files_dir, blob)
+    with local_blob(files_dir, blob) as path:
+        if not os.path.exists(thumb_path):
+            generate_thumbnail(path, thumb_path)
+        text = extract_text(path) if can_extract(blob) else None
+    return blob, size, text
+
+
+def _new_item(root, rel, blob, size, now):
+    fields = infer_metadata(rel)
+    return {
+        "id": f"{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}_{fields['original_name']}",
+        "original_name": fields["original_name"],
+        "title": fields["title"],
+        "subject": fields["subject"],
+        "grade_group": fields["grade_group"],
+        "area": fields["area"],
+        "unit": fields["unit"],
+        "lesson": fields["lesson"],
+        "description": "",
+        "keywords": [],
+        "upload_date": now.strftime("%Y-%m-%d %H:%M:%S"),
+        "file_size": size,
+        "file_type": mimetypes.guess_type(fields["original_name"])[0] or "application/octet-stream",
+        "blob": blob,
+        "source_path": source_key(root, rel),
+    }
+
+
+def import_tree(root, data_dir=DATA_DIR, workers=None, dry_run=False, log=print):
+    """폴더 트리를 가져옵니다. (새로 가져온 자료 수, 실패한 파일 [(상대 경로, 오류)])를 반환합니다."""
+    files_dir = os.path.join(data_dir, "files")
+    os.makedirs(files_dir, exist_ok=True)
+    store = open_store(data_dir)
+    text_store = TextStore(os.path.join(data_dir, "texts.db"))
+
+    # 이미 가져온 파일은 건너뜀 (실제 경로가 같은 파일)
+    imported = {item["source_path"] for item in store.all() if item.get("source_path")}
+    found = find_files(root)
+    todo = [rel for rel in found if source_key(root, rel) not in imported]
+    log(f"📁 파일 {len(todo)}개를 새로 가져옵니다. (이미 가져온 파일 {len(found) - len(todo)}개는 건너뜀)")
+    if dry_run or not todo:
+        for rel in todo:
+            log(f"  • {rel}")
+        return 0, []
+
+    indexes = (SearchIndex(os.path.join(data_dir, "search.db")),
+               RecommendationIndex(os.path.join(data_dir, "recommend.db")),
+               CurriculumTree(os.path.join(data_dir, "tree.db")))
+    tiering = BlobTiering(os.path.join(data_dir, "tiers.db"), files_dir)
+    added = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(todo), CHUNK_SIZE):
+            chunk = todo[start:start + CHUNK_SIZE]
+            futures = [pool.submit(_copy_one, (os.path.join(root, rel), files_dir)) for rel in chunk]
+            items = []
+            bodies = {}
+            now = datetime.now()
+            for rel, future in zip(chunk, futures):
+                try:
+                    blob, size, text = future.result()
+                except Exception as e:
+                    # 읽을 수 없는 파일 하나 때문에 전체를 멈추지 않음 (다시 실행하면 이 파일만 다시 시도)
+                    failed.append((rel, e))
+                    log(f"  ⚠️ {rel}: {e}")
+                    continue
+                if text is not None and not text_store.has(blob):
+                    text_store.put(blob, text)
+                bodies[blob] = text_store.get(blob)
+                items.append(_new_item(root, rel, blob, size, now))
+            if not items:
+                log(f"  … {start + len(chunk)}/{len(todo)}개 처리")
+                continue
+
+            # 묶음마다 메타데이터를 한 번에 기록하고 색인도 갱신 (중간에 멈춰도 기록한 묶음은 다시 가져오지 않음)
+            version_before = store.version()
+            store.add_many(items)
+            indexes[0].add_many(dict(item, body=bodies[item["blob"]]) for item in items)
+            indexes[1].add_many(items)
+            indexes[2].add_many(items)
+            # 그사이 앱에서 자료를 고치지 않았으면 이 버전까지 반영했다고 기록 (고쳤으면 앱이 다시 색인)
+            version = store.version()
+            if version == version_before + 1:
+                for index in indexes:
+                    index.mark_synced(version)
+            tiering.backfill({item["blob"] for item in items})
+            added += len(items)
+            log(f"  … {start + len(chunk)}/{len(todo)}개 처리")
+
+    log(f"✅ {added}개의 자료를 가져왔습니다. (총 {store.count()}개)")
+    if failed:
+        log(f"❌ {len(failed)}개 파일을 가져오지 못했습니다:")
+        for rel, e in failed:
+            log(f"  • {rel}: {e}")
+    return added, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="과목/학년군/영역/단원/차시 폴더의 자료를 포트폴리오로 가져옵니다.")
+    parser.add_argument("root", help="가져올 자료 폴더")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="포트폴리오 데이터 폴더 (기본: teacher_data)")
+    parser.add_argument("--workers", type=int, default=None, help="동시에 처리할 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--dry-run", action="store_true", help="가져올 파일 목록만 보여주기")
+    args = parser.parse_args()
+    if not os.path.isdir(args.root):
+        print(f"❌ 폴더를 찾을 수 없습니다: {args.root}")
+        sys.exit(1)
+    added, failed = import_tree(args.root, args.data_dir, args.workers, args.dry_run)
+    sys.exit(1 if failed else 0)
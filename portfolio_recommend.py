@@ -0,0 +1,296 @@
+"""
+교사 포트폴리오 연계 추천
+자료끼리의 유사도를 키워드(드문 키워드일수록 높은 가중치), 단원, 영역, 교과 간 연계로 계산하고,
+자료마다 가장 비슷한 자료 TOP_K개를 teacher_data/recommend.db 에 미리 저장해 둡니다.
+업로드하면 새 자료와 키워드/단원이 겹치는 자료만 다시 비교하고,
+삭제하면 그 자료를 이웃으로 가지고 있던 자료만 다시 계산합니다.
+"""
+import math
+import json
+import sqlite3
+import threading
+
+TOP_K = 5
+
+# 유사도 가중치
+UNIT_WEIGHT = 0.5          # 같은 단원
+AREA_WEIGHT = 0.2          # 같은 영역
+CROSS_SUBJECT_BONUS = 0.3  # 다른 과목인데 키워드가 겹치는 경우 (교과 간 연계)
+
+# 너무 흔한 키워드는 후보를 찾을 때 쓰지 않음 (근사 계산, 점수에는 거의 영향이 없음)
+MAX_POSTING = 2000
+
+
+def _normalize_unit(unit):
+    return " ".join((unit or "").split()).lower()
+
+
+class RecommendationIndex:
+    """자료별 이웃(비슷한 자료) 목록을 SQLite에 저장하는 추천 색인"""
+
+    def __init__(self, path, top_k=TOP_K):
+        self.path = path
+        self.top_k = top_k
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS features (
+                    item_id TEXT PRIMARY KEY,
+                    subject TEXT,
+                    area TEXT,
+                    unit TEXT,
+                    keywords TEXT NOT NULL
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_features_unit ON features(unit);
+                CREATE TABLE IF NOT EXISTS keyword_postings (
+                    keyword TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    PRIMARY KEY (keyword, item_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_keyword_postings_item ON keyword_postings(item_id);
+                CREATE TABLE IF NOT EXISTS neighbors (
+                    item_id TEXT NOT NULL,
+                    neighbor_id TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    PRIMARY KEY (item_id, neighbor_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_neighbors_neighbor ON neighbors(neighbor_id);
+                CREATE INDEX IF NOT EXISTS idx_neighbors_score ON neighbors(score);
+                CREATE TABLE IF NOT EXISTS index_info (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                ) WITHOUT ROWID;
+            """)
+
+    # --- 내부 계산 ---
+
+    def _features(self, item_id):
+        row = self._conn.execute("SELECT * FROM features WHERE item_id = ?", (item_id,)).fetchone()
+        if row is None:
+            return None
+        return {"id": row["item_id"], "subject": row["subject"], "area": row["area"],
+                "unit": row["unit"], "keywords": set(json.loads(row["keywords"]))}
+
+    def _idf(self, keywords):
+        if not keywords:
+            return {}
+        total = self._conn.execute("SELECT COUNT(*) FROM features").fetchone()[0] or 1
+        keywords = list(keywords)
+        doc_freq = {}
+        for i in range(0, len(keywords), 500):
+            batch = keywords[i:i + 500]
+            doc_freq.update(self._conn.execute(
+                f"SELECT keyword, COUNT(*) FROM keyword_postings WHERE keyword IN ({', '.join('?' for _ in batch)}) "
+                f"GROUP BY keyword", batch
+            ).fetchall())
+        return {kw: math.log(1 + total / doc_freq.get(kw, 1)) for kw in keywords}
+
+    def _candidates(self, features):
+        """키워드나 단원이 겹치는 자료 id를 찾습니다."""
+        candidates = set()
+        for keyword in features["keywords"]:
+            rows = self._conn.execute(
+                "SELECT item_id FROM keyword_postings WHERE keyword = ? LIMIT ?", (keyword, MAX_POSTING + 1)
+            ).fetchall()
+            if len(rows) <= MAX_POSTING:
+                candidates.update(row[0] for row in rows)
+        if features["unit"]:
+            rows = self._conn.execute(
+                "SELECT item_id FROM features WHERE unit = ? LIMIT ?", (features["unit"], MAX_POSTING)
+            ).fetchall()
+            candidates.update(row[0] for row in rows)
+        candidates.discard(features["id"])
+        return candidates
+
+    def _score(self, a, b, idf):
+        """두 자료의 유사도를 계산합니다."""
+        shared = a["keywords"] & b["keywords"]
+        score = 0.0
+        if shared:
+            norm = math.sqrt(sum(idf.get(kw, 1.0) ** 2 for kw in a["keywords"])
+                             * sum(idf.get(kw, 1.0) ** 2 for kw in b["keywords"]))
+            score = sum(idf.get(kw, 1.0) ** 2 for kw in shared) / norm
+            if a["subject"] != b["subject"]:
+                score += CROSS_SUBJECT_BONUS * score
+        if a["unit"] and a["unit"] == b["unit"]:
+            score += UNIT_WEIGHT
+        if score and a["area"] == b["area"]:
+            score += AREA_WEIGHT
+        return score
+
+    def _scored_candidates(self, features):
+        scored = []
+        candidates = [self._features(item_id) for item_id in self._candidates(features)]
+        keywords = set(features["keywords"])
+        for other in candidates:
+            keywords |= other["keywords"]
+        idf = self._idf(keywords)
+        for other in candidates:
+            score = self._score(features, other, idf)
+            if score > 0:
+                scored.append((other["id"], score))
+        return scored
+
+    def _set_neighbors(self, item_id, scored):
+        top = sorted(scored, key=lambda pair: (-pair[1], pair[0]))[:self.top_k]
+        self._conn.execute("DELETE FROM neighbors WHERE item_id = ?", (item_id,))
+        self._conn.executemany(
+            "INSERT INTO neighbors (item_id, neighbor_id, score) VALUES (?, ?, ?)",
+            [(item_id, neighbor_id, score) for neighbor_id, score in top]
+        )
+
+    def _offer(self, item_id, neighbor_id, score):
+        """item_id의 이웃 목록에 더 비슷한 자료가 생겼으면 끼워 넣습니다."""
+        rows = self._conn.execute(
+            "SELECT neighbor_id, score FROM neighbors WHERE item_id = ? ORDER BY score ASC", (item_id,)
+        ).fetchall()
+        if len(rows) >= self.top_k:
+            if score <= rows[0]["score"]:
+                return
+            self._conn.execute(
+                "DELETE FROM neighbors WHERE item_id = ? AND neighbor_id = ?", (item_id, rows[0]["neighbor_id"])
+            )
+        self._conn.execute(
+            "INSERT OR REPLACE INTO neighbors (item_id, neighbor_id, score) VALUES (?, ?, ?)",
+            (item_id, neighbor_id, score)
+        )
+
+    def _insert_features(self, item):
+        keywords = sorted(set(item.get("keywords", [])))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO features (item_id, subject, area, unit, keywords) VALUES (?, ?, ?, ?, ?)",
+            (item["id"], item.get("subject"), item.get("area"), _normalize_unit(item.get("unit")),
+             json.dumps(keywords, ensure_ascii=False))
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO keyword_postings (keyword, item_id) VALUES (?, ?)",
+            [(kw, item["id"]) for kw in keywords]
+        )
+
+    def _delete(self, item_id):
+        self._conn.execute("DELETE FROM features WHERE item_id = ?", (item_id,))
+        self._conn.execute("DELETE FROM keyword_postings WHERE item_id = ?", (item_id,))
+        self._conn.execute("DELETE FROM neighbors WHERE item_id = ?", (item_id,))
+
+    # --- 공개 메서드 ---
+
+    def _add(self, item):
+        self._delete(item["id"])
+        self._insert_features(item)
+        scored = self._scored_candidates(self._features(item["id"]))
+        self._set_neighbors(item["id"], scored)
+        for other_id, score in scored:
+            self._offer(other_id, item["id"], score)
+
+    def add(self, item):
+        """새 자료를 추가하고, 겹치는 자료들의 이웃 목록을 갱신합니다."""
+        with self._lock, self._conn:
+            self._add(item)
+
+    def add_many(self, items):
+        """여러 자료를 한 트랜잭션으로 추가합니다."""
+        with self._lock, self._conn:
+            for item in items:
+                self._add(item)
+
+    def _remove_many(self, item_ids):
+        affected = set()
+        for item_id in item_ids:
+            affected.update(row[0] for row in self._conn.execute(
+                "SELECT item_id FROM neighbors WHERE neighbor_id = ?", (item_id,)
+            ).fetchall())
+            self._delete(item_id)
+            self._conn.execute("DELETE FROM neighbors WHERE neighbor_id = ?", (item_id,))
+        # 지운 자료를 이웃으로 가지고 있던 자료는 한 번씩만 다시 계산
+        for other_id in sorted(affected):
+            features = self._features(other_id)
+            if features is not None:
+                self._set_neighbors(other_id, self._scored_candidates(features))
+
+    def remove(self, item_id):
+        """자료를 지우고, 이 자료를 이웃으로 가지고 있던 자료만 이웃 목록을 다시 계산합니다."""
+        with self._lock, self._conn:
+            self._remove_many([item_id])
+
+    def remove_many(self, item_ids):
+        """여러 자료를 한 트랜잭션으로 지웁니다."""
+        with self._lock, self._conn:
+            self._remove_many(item_ids)
+
+    def update_many(self, items):
+        """내용이 바뀐 자료들을 빼고 다시 넣어 이웃 목록을 새로 계산합니다. (한 트랜잭션)"""
+        with self._lock, self._conn:
+            self._remove_many([item["id"] for item in items])
+            for item in items:
+                self._add(item)
+
+    def rebuild(self, items, version=None):
+        """전체 자료로 추천 색인을 처음부터 다시 만듭니다.
+        version 을 주면 그 저장소 버전까지 반영했다고 함께 기록합니다."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM features")
+            self._conn.execute("DELETE FROM keyword_postings")
+            self._conn.execute("DELETE FROM neighbors")
+            for item in items:
+                self._insert_features(item)
+            for item in items:
+                self._set_neighbors(item["id"], self._scored_candidates(self._features(item["id"])))
+            if version is not None:
+                self._mark_synced(version)
+
+    def _mark_synced(self, version):
+        self._conn.execute(
+            "INSERT INTO index_info (key, value) VALUES ('store_version', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (str(version),)
+        )
+
+    def mark_synced(self, version):
+        """메타데이터 저장소의 version() 까지 반영했다고 기록합니다."""
+        with self._lock, self._conn:
+            self._mark_synced(version)
+
+    def synced_version(self):
+        """마지막으로 반영한 메타데이터 저장소의 version() 을 반환합니다. 기록이 없으면 None입니다."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM index_info WHERE key = 'store_version'").fetchone()
+        return int(row[0]) if row else None
+
+    def count(self):
+        """추천 색인에 들어 있는 자료 수를 반환합니다."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+
+    def related(self, item_id, limit=TOP_K):
+        """비슷한 자료를 (자료 id, 점수, 겹치는 키워드) 목록으로 점수 높은 순으로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT neighbor_id, score FROM neighbors WHERE item_id = ? ORDER BY score DESC LIMIT ?",
+                (item_id, limit)
+            ).fetchall()
+            features = self._features(item_id)
+            related = []
+            for row in rows:
+                other = self._features(row["neighbor_id"])
+                shared = sorted(features["keywords"] & other["keywords"]) if features and other else []
+                related.append((row["neighbor_id"], row["score"], shared))
+        return related
+
+    def top_pairs(self, limit=10):
+        """가장 비슷한 자료 쌍을 (자료 id, 자료 id, 점수) 목록으로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id, neighbor_id, score FROM neighbors "
+                "WHERE item_id < neighbor_id OR NOT EXISTS ("
+                "    SELECT 1 FROM neighbors AS other "
+                "    WHERE other.item_id = neighbors.neighbor_id AND other.neighbor_id = neighbors.item_id) "
+                "ORDER BY score DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row["item_id"], row["neighbor_id"], row["score"]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,205 @@
+"""
+교사 포트폴리오 검색 색인
+제목, 단원, 설명, 키워드와 문서 본문(portfolio_extract 에서 추출)을
+글자 n-gram(1-gram, 2-gram)으로 잘라 역색인(inverted index)에 저장합니다.
+한국어는 띄어쓰기만으로 단어를 나누기 어려우므로 글자 단위로 잘라서 부분 문자열 검색처럼 동작하게 합니다.
+색인은 teacher_data/search.db 에 저장되고, 업로드/삭제 때마다 해당 자료만 갱신합니다.
+"""
+import re
+import math
+import sqlite3
+import threading
+import unicodedata
+from collections import Counter
+
+# 필드별 가중치 (제목/키워드에서 찾은 자료가 먼저 나오도록)
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "keywords": 2.5,
+    "unit": 2.0,
+    "description": 1.0,
+    "body": 0.5,
+}
+
+# 색인에 넣는 본문 최대 글자 수 (아주 긴 문서가 색인을 너무 키우지 않도록)
+MAX_BODY_CHARS = 10000
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """검색용으로 유니코드 정규화(NFC)와 소문자 변환을 합니다."""
+    return unicodedata.normalize("NFC", text or "").lower()
+
+
+def tokenize(text):
+    """텍스트를 단어별 1-gram, 2-gram 토큰 목록으로 자릅니다."""
+    tokens = []
+    for word in _WORD_RE.findall(normalize(text)):
+        tokens.extend(word)
+        tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def query_terms(text):
+    """검색어를 색인 조회용 토큰 집합으로 바꿉니다. 두 글자 이상인 단어는 2-gram만 사용합니다."""
+    terms = set()
+    for word in _WORD_RE.findall(normalize(text)):
+        if len(word) == 1:
+            terms.add(word)
+        else:
+            terms.update(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def document_weights(item):
+    """자료 한 건의 토큰별 가중치를 계산합니다."""
+    weights = Counter()
+    for field, field_weight in FIELD_WEIGHTS.items():
+        value = item.get(field, "")
+        if isinstance(value, list):
+            value = " ".join(value)
+        elif field == "body":
+            value = value[:MAX_BODY_CHARS]
+        for token in tokenize(value):
+            weights[token] += field_weight
+    return weights
+
+
+class SearchIndex:
+    """SQLite에 저장되는 글자 n-gram 역색인"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    weight REAL NOT NULL,
+                    PRIMARY KEY (term, doc_id)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id TEXT PRIMARY KEY,
+                    terms TEXT NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS index_info (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                ) WITHOUT ROWID;
+            """)
+
+    def _add(self, item):
+        self._remove(item["id"])
+        weights = document_weights(item)
+        self._conn.executemany(
+            "INSERT INTO postings (term, doc_id, weight) VALUES (?, ?, ?)",
+            [(term, item["id"], weight) for term, weight in weights.items()]
+        )
+        # 삭제할 때 어떤 posting을 지워야 하는지 알 수 있도록 토큰 목록을 함께 저장
+        self._conn.execute(
+            "INSERT INTO documents (doc_id, terms) VALUES (?, ?)",
+            (item["id"], "\n".join(weights))
+        )
+
+    def _remove(self, doc_id):
+        row = self._conn.execute("SELECT terms FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return False
+        self._conn.executemany(
+            "DELETE FROM postings WHERE term = ? AND doc_id = ?",
+            [(term, doc_id) for term in row[0].split("\n") if term]
+        )
+        self._conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        return True
+
+    def add(self, item):
+        """자료 한 건을 색인에 추가합니다. 이미 있으면 새 내용으로 바꿉니다."""
+        with self._lock, self._conn:
+            self._add(item)
+
+    def add_many(self, items):
+        """여러 자료를 한 트랜잭션으로 색인에 추가합니다."""
+        with self._lock, self._conn:
+            for item in items:
+                self._add(item)
+
+    def remove(self, doc_id):
+        """자료 한 건을 색인에서 지웁니다."""
+        with self._lock, self._conn:
+            return self._remove(doc_id)
+
+    def remove_many(self, doc_ids):
+        """여러 자료를 한 트랜잭션으로 색인에서 지웁니다."""
+        with self._lock, self._conn:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+
+    def rebuild(self, items, version=None):
+        """전체 자료로 색인을 처음부터 다시 만듭니다.
+        version 을 주면 그 저장소 버전까지 반영했다고 함께 기록합니다."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM documents")
+            for item in items:
+                self._add(item)
+            if version is not None:
+                self._mark_synced(version)
+
+    def _mark_synced(self, version):
+        self._conn.execute(
+            "INSERT INTO index_info (key, value) VALUES ('store_version', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (str(version),)
+        )
+
+    def mark_synced(self, version):
+        """메타데이터 저장소의 version() 까지 반영했다고 기록합니다."""
+        with self._lock, self._conn:
+            self._mark_synced(version)
+
+    def synced_version(self):
+        """마지막으로 반영한 메타데이터 저장소의 version() 을 반환합니다. 기록이 없으면 None입니다."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM index_info WHERE key = 'store_version'").fetchone()
+        return int(row[0]) if row else None
+
+    def count(self):
+        """색인된 자료 수를 반환합니다."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def search(self, text, limit=None):
+        """검색어의 모든 토큰을 포함하는 자료 id를 점수 높은 순으로 반환합니다."""
+        terms = sorted(query_terms(text))
+        if not terms:
+            return []
+        placeholders = ", ".join("?" for _ in terms)
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            doc_freq = dict(self._conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term",
+                terms
+            ).fetchall())
+            # 하나라도 색인에 없는 토큰이 있으면 일치하는 자료가 없음
+            if len(doc_freq) < len(terms):
+                return []
+            idf = {term: math.log(1 + total / doc_freq[term]) for term in terms}
+            score_expr = " ".join(f"WHEN ? THEN {idf[term]!r}" for term in terms)
+            sql = (
+                f"SELECT doc_id, SUM(weight * CASE term {score_expr} END) AS score "
+                f"FROM postings WHERE term IN ({placeholders}) "
+                f"GROUP BY doc_id HAVING COUNT(*) = ? ORDER BY score DESC, doc_id"
+            )
+            params = terms + terms + [len(terms)]
+            if limit is not None:
+                sql += " LIMIT ?"
+                params.append(limit)
+            return [row[0] for row in self._conn.execute(sql, params).fetchall()]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
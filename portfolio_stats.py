@@ -0,0 +1,83 @@
+"""
+교사 포트폴리오 통계 집계
+과목/학년군/영역별 자료 수, 키워드별 자료 수, 총 용량, 날짜별 업로드 수를
+업로드/삭제 때마다 조금씩 고쳐 저장해 두고, 통계 탭은 저장된 값만 읽습니다.
+
+집계가 실제 자료와 맞는지 확인하거나 처음부터 다시 계산하려면:
+    python portfolio_stats.py verify
+    python portfolio_stats.py rebuild
+"""
+import sys
+from collections import Counter
+
+# 자료 수를 세는 항목
+COUNT_DIMENSIONS = ("subject", "grade_group", "area")
+
+
+def stat_deltas(item):
+    """자료 한 건이 집계에 더하는 (항목, 값, 증가량) 목록을 반환합니다."""
+    deltas = [
+        ("total", "count", 1),
+        ("total", "bytes", item.get("file_size") or 0),
+        ("day", item["upload_date"][:10], 1),
+    ]
+    deltas.extend((dimension, item[dimension], 1) for dimension in COUNT_DIMENSIONS)
+    deltas.extend(("keyword", keyword, 1) for keyword in item.get("keywords", []))
+    return deltas
+
+
+def apply_deltas(counts, item, sign=1):
+    """집계 Counter에 자료 한 건을 더하거나(sign=1) 뺍니다(sign=-1). 0이 된 값은 지웁니다."""
+    for dimension, value, amount in stat_deltas(item):
+        key = (dimension, value)
+        counts[key] += sign * amount
+        if counts[key] == 0 and dimension != "total":
+            del counts[key]
+
+
+def compute_stats(items):
+    """전체 자료를 처음부터 읽어 집계를 계산합니다. (검증/재생성용)"""
+    counts = Counter({("total", "count"): 0, ("total", "bytes"): 0})
+    for item in items:
+        apply_deltas(counts, item)
+    return counts
+
+
+def summarize(counts, top_keywords=10):
+    """집계 Counter를 통계 탭에서 쓰는 형태로 정리합니다."""
+    summary = {dimension: {} for dimension in COUNT_DIMENSIONS + ("keyword", "day")}
+    summary["count"] = counts.get(("total", "count"), 0)
+    summary["bytes"] = counts.get(("total", "bytes"), 0)
+    for (dimension, value), count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0][1])):
+        if dimension in summary and dimension != "total":
+            summary[dimension][value] = count
+    summary["keyword"] = dict(list(summary["keyword"].items())[:top_keywords])
+    return summary
+
+
+def verify(store):
+    """저장된 집계와 전체 재계산 결과를 비교해 서로 다른 항목을 반환합니다."""
+    expected = compute_stats(store.all())
+    actual = store.stat_counts()
+    keys = set(expected) | set(actual)
+    return {key: (actual.get(key, 0), expected.get(key, 0))
+            for key in keys if actual.get(key, 0) != expected.get(key, 0)}
+
+
+if __name__ == "__main__":
+    from portfolio_store import open_store
+
+    command = sys.argv[1] if len(sys.argv) >= 2 else ""
+    store = open_store()
+    if command == "verify":
+        mismatches = verify(store)
+        if mismatches:
+            for (dimension, value), (actual, expected) in sorted(mismatches.items()):
+                print(f"❌ {dimension}/{value}: 저장된 값 {actual}, 실제 값 {expected}")
+            sys.exit(1)
+        print("✅ 통계 집계가 실제 자료와 일치합니다.")
+    elif command == "rebuild":
+        store.rebuild_stats()
+        print(f"✅ 통계 집계를 다시 계산했습니다. (자료 {store.count()}개)")
+    else:
+        print("사용법: python portfolio_stats.py verify|rebuild")
@@ -0,0 +1,765 @@
+"""
+교사 포트폴리오 메타데이터 저장소
+자료 메타데이터를 저장하는 백엔드를 교체할 수 있도록 분리한 모듈입니다.
+기본값은 SQLite(WAL 모드)이며, 환경 변수 PORTFOLIO_BACKEND=json 으로 JSON 파일 방식을 쓸 수 있습니다.
+(JSON 방식은 metadata.json 스냅숏과 metadata.log 작업 기록으로 저장합니다.)
+
+기존 metadata.json 을 SQLite로 옮기려면:
+    python portfolio_store.py migrate
+"""
+import os
+import sys
+import json
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 에는 fcntl 이 없음 (프로세스 하나로 실행할 때는 프로세스 안 자물쇠로 충분)
+    fcntl = None
+
+from portfolio_stats import stat_deltas, apply_deltas, compute_stats, summarize
+from portfolio_frame import MetadataFrame
+
+DATA_DIR = "teacher_data"
+METADATA_FILE_NAME = "metadata.json"
+DB_FILE_NAME = "metadata.db"
+DEFAULT_BACKEND = os.environ.get("PORTFOLIO_BACKEND", "sqlite")
+
+# 자료 한 건을 이루는 기본 필드 (keywords 제외)
+FIELDS = (
+    "id", "original_name", "title", "subject", "grade_group", "area",
+    "unit", "lesson", "description", "upload_date", "file_size", "file_type",
+)
+
+# 목록 정렬 기준 (화면 이름 -> 필드)
+SORT_KEYS = {
+    "업로드일": "upload_date",
+    "제목": "title",
+    "과목": "subject",
+    "파일 크기": "file_size",
+}
+
+SCHEMA_VERSION = 5
+
+# JSON 저장소: 작업 기록이 이 줄 수를 넘으면 스냅숏으로 합침
+COMPACT_EVERY = 500
+
+# SQLite 한 쿼리에 넣을 id 개수
+_ID_BATCH = 500
+
+
+class MetadataStore:
+    """메타데이터 저장소 공통 인터페이스"""
+
+    def all(self):
+        """모든 자료를 업로드 순서대로 반환합니다."""
+        raise NotImplementedError
+
+    def get(self, file_id):
+        """id로 자료 한 건을 찾습니다. 없으면 None을 반환합니다."""
+        raise NotImplementedError
+
+    def add(self, item):
+        """자료 한 건을 추가합니다."""
+        raise NotImplementedError
+
+    def add_many(self, items):
+        """여러 자료를 한 번의 쓰기로 추가합니다."""
+        raise NotImplementedError
+
+    def remove(self, file_id):
+        """id로 자료 한 건을 삭제합니다. 삭제했으면 True를 반환합니다."""
+        raise NotImplementedError
+
+    def remove_many(self, ids):
+        """여러 자료를 한 번의 쓰기로 삭제합니다. 삭제한 자료 목록을 반환합니다."""
+        raise NotImplementedError
+
+    def update_many(self, items):
+        """여러 자료의 내용을 한 번의 쓰기로 바꿉니다. (id로 찾고 업로드 순서는 그대로, 없는 id는 건너뜀)
+        바꾼 자료 수를 반환합니다."""
+        raise NotImplementedError
+
+    def count(self):
+        """전체 자료 수를 반환합니다."""
+        raise NotImplementedError
+
+    def get_many(self, ids):
+        """주어진 id 순서대로 자료를 반환합니다. 없는 id는 건너뜁니다."""
+        raise NotImplementedError
+
+    def blob_refcount(self, blob):
+        """같은 파일 내용(blob)을 가리키는 자료 수를 반환합니다."""
+        raise NotImplementedError
+
+    def stats(self, top_keywords=10):
+        """저장된 통계 집계를 반환합니다. (portfolio_stats.summarize 형태)"""
+        raise NotImplementedError
+
+    def stat_counts(self):
+        """저장된 통계 집계를 (항목, 값) -> 값 Counter로 반환합니다."""
+        raise NotImplementedError
+
+    def rebuild_stats(self):
+        """전체 자료로 통계 집계를 다시 계산해 저장합니다."""
+        raise NotImplementedError
+
+    def version(self):
+        """저장된 자료가 바뀔 때마다 커지는 값을 반환합니다. (캐시 무효화, 색인 동기화용)
+        파일에 저장되므로 앱을 다시 켜도, 다른 프로세스에서 읽어도 같은 값입니다."""
+        raise NotImplementedError
+
+    def close(self):
+        """열어 둔 데이터베이스 연결을 닫습니다. (JSON 방식은 닫을 것이 없음)"""
+
+
+@contextmanager
+def _file_lock(path):
+    """여러 프로세스가 같은 기록 파일에 쓸 때 한 번에 하나만 쓰도록 잠급니다. (fcntl.flock)
+    기록 파일은 정리할 때 새 파일로 바뀌므로 따로 둔 잠금 파일을 잠급니다."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class JsonMetadataStore(MetadataStore):
+    """metadata.json 스냅숏 + metadata.log 작업 기록(한 줄에 업로드/삭제 한 건)으로 저장하는 방식
+    쓰기는 기록 파일 끝에 한 줄만 덧붙이고, 기록이 COMPACT_EVERY 줄을 넘으면
+    백그라운드 스레드가 임시 파일에 새 스냅숏을 쓴 뒤 이름을 바꿔(원자적으로) 교체합니다.
+    시작할 때는 스냅숏을 읽고 기록을 차례로 다시 적용합니다.
+    덧붙이기와 정리는 잠금 파일(metadata.lock)을 잠그고 하므로 여러 프로세스가 함께 써도 기록을 잃지 않습니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log"
+        self.lock_path = os.path.splitext(path)[0] + ".lock"
+        # 쓰기 횟수 (version()). 프로세스를 다시 켜도, 다른 프로세스에서도 같은 값이 되도록 파일에 둠
+        self.version_path = os.path.splitext(path)[0] + ".version"
+        self._lock = threading.RLock()
+        self._signature = None
+        self._revision = 0
+        self._log_entries = 0
+        self._compacting = False
+        self._torn = False
+        self._items = {}
+        self._stats = Counter()
+        self._load()
+
+    def _file_signature(self):
+        signature = []
+        for path in (self.path, self.log_path):
+            stat = os.stat(path) if os.path.exists(path) else None
+            signature.append((stat.st_mtime_ns, stat.st_size) if stat else None)
+        return tuple(signature)
+
+    def _apply(self, entry):
+        # 같은 기록을 두 번 적용해도 결과가 같도록 id 기준으로 처리
+        if entry["op"] == "add":
+            item = entry["item"]
+            old = self._items.get(item['id'])
+            if old is not None:
+                apply_deltas(self._stats, old, sign=-1)
+            # 이미 있는 id는 제자리에서 바꿈 (업로드 순서 유지)
+            self._items[item['id']] = item
+            apply_deltas(self._stats, item)
+        elif entry["op"] == "remove":
+            old = self._items.pop(entry["id"], None)
+            if old is not None:
+                apply_deltas(self._stats, old, sign=-1)
+
+    def _load(self, repair=False):
+        self._signature = self._file_signature()
+        self._torn = False
+        try:
+            with open(self.version_path, 'r', encoding='utf-8') as f:
+                self._revision = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            self._revision = 0
+        items = []
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+        self._items = {item['id']: item for item in items}
+        self._stats = compute_stats(self._items.values())
+        self._log_entries = 0
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                if repair:
+                    # 쓰는 도중 멈춰서 잘린 마지막 줄은 잘라냄 (다음 기록이 그 뒤에 붙지 않도록)
+                    with open(self.log_path, 'r+b') as f:
+                        f.truncate(complete)
+                    self._signature = self._file_signature()
+                else:
+                    # 잠금 없이 읽을 때는 다른 프로세스가 아직 쓰는 중일 수 있으므로 건너뛰기만 함
+                    self._torn = True
+            for line in data[:complete].splitlines():
+                self._apply(json.loads(line))
+                self._log_entries += 1
+
+    def _reload_if_changed(self):
+        # 다른 프로세스가 파일을 고쳤으면 다시 읽어서, 그 변경을 덮어쓰지 않도록 함
+        if self._file_signature() != self._signature:
+            self._load()
+
+    @contextmanager
+    def _writing(self):
+        """쓰기 전에 프로세스 안/밖 자물쇠를 모두 잡고 다른 프로세스의 변경을 다시 읽습니다."""
+        with self._lock, _file_lock(self.lock_path):
+            if self._torn or self._file_signature() != self._signature:
+                self._load(repair=True)
+            yield
+
+    def _write_version(self, version):
+        tmp_path = f"{self.version_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(version))
+        os.replace(tmp_path, self.version_path)
+
+    def _append(self, *entries):
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        # 버전을 먼저 올림 (기록 전에 멈추면 버전만 앞서서 색인을 한 번 더 만들 뿐, 바뀐 자료를 놓치지 않음)
+        self._write_version(self._revision + 1)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        for entry in entries:
+            self._apply(entry)
+        self._signature = self._file_signature()
+        self._revision += 1
+        self._log_entries += len(entries)
+        if self._log_entries >= COMPACT_EVERY and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, name="metadata-compaction", daemon=True).start()
+
+    def compact(self):
+        """현재 자료 전체를 새 스냅숏으로 쓰고, 스냅숏에 반영된 기록을 지웁니다."""
+        try:
+            with self._writing():
+                items = list(self._items.values())
+                log_offset = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+                snapshot = self._signature[0]
+            # 스냅숏은 자물쇠 밖에서 임시 파일에 씀 (그동안 다른 쓰기는 기록 파일에 계속 덧붙음)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(items, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._writing():
+                if self._signature[0] != snapshot:
+                    # 그사이 다른 프로세스가 먼저 정리함 (log_offset 이 더는 맞지 않음)
+                    os.remove(tmp_path)
+                    return
+                os.replace(tmp_path, self.path)
+                # 스냅숏 이후에 덧붙은 기록만 남김
+                remaining = b""
+                if os.path.exists(self.log_path):
+                    with open(self.log_path, 'rb') as f:
+                        f.seek(log_offset)
+                        remaining = f.read()
+                tmp_log_path = f"{self.log_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_log_path, 'wb') as f:
+                    f.write(remaining)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_log_path, self.log_path)
+                self._log_entries = remaining.count(b"\n")
+                self._signature = self._file_signature()
+        finally:
+            self._compacting = False
+
+    def all(self):
+        with self._lock:
+            self._reload_if_changed()
+            return list(self._items.values())
+
+    def get(self, file_id):
+        with self._lock:
+            self._reload_if_changed()
+            return self._items.get(file_id)
+
+    def add(self, item):
+        with self._writing():
+            self._append({"op": "add", "item": item})
+
+    def add_many(self, items):
+        with self._writing():
+            if items:
+                self._append(*({"op": "add", "item": item} for item in items))
+
+    def remove(self, file_id):
+        with self._writing():
+            if file_id not in self._items:
+                return False
+            self._append({"op": "remove", "id": file_id})
+            return True
+
+    def remove_many(self, ids):
+        with self._writing():
+            removed = [self._items[file_id] for file_id in dict.fromkeys(ids) if file_id in self._items]
+            if removed:
+                self._append(*({"op": "remove", "id": item['id']} for item in removed))
+            return removed
+
+    def update_many(self, items):
+        with self._writing():
+            items = [item for item in items if item['id'] in self._items]
+            if items:
+                self._append(*({"op": "add", "item": item} for item in items))
+            return len(items)
+
+    def count(self):
+        with self._lock:
+            self._reload_if_changed()
+            return len(self._items)
+
+    def get_many(self, ids):
+        with self._lock:
+            self._reload_if_changed()
+            return [self._items[file_id] for file_id in ids if file_id in self._items]
+
+    def blob_refcount(self, blob):
+        # 공유 파일을 지울지 정하는 값이므로 다른 프로세스가 올린 자료까지 다시 읽고 셈
+        with self._lock:
+            self._reload_if_changed()
+            return sum(1 for item in self._items.values() if item.get('blob') == blob)
+
+    def stats(self, top_keywords=10):
+        with self._lock:
+            self._reload_if_changed()
+            return summarize(self._stats, top_keywords)
+
+    def stat_counts(self):
+        with self._lock:
+            return Counter(self._stats)
+
+    def rebuild_stats(self):
+        with self._lock:
+            self._stats = compute_stats(self._items.values())
+
+    def version(self):
+        # 버전 파일과 기록 파일을 쓰는 사이에 읽지 않도록 파일 자물쇠를 잡고 읽음
+        with self._lock, _file_lock(self.lock_path):
+            self._reload_if_changed()
+            return self._revision
+
+
+class SqliteMetadataStore(MetadataStore):
+    """SQLite(WAL 모드)에 자료를 한 행씩 저장하는 방식"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version < 1:
+                self._conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS resources (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id TEXT NOT NULL UNIQUE,
+                        original_name TEXT,
+                        title TEXT,
+                        subject TEXT,
+                        grade_group TEXT,
+                        area TEXT,
+                        unit TEXT,
+                        lesson TEXT,
+                        description TEXT,
+                        upload_date TEXT,
+                        file_size INTEGER,
+                        file_type TEXT,
+                        keywords TEXT NOT NULL DEFAULT '[]',
+                        extra TEXT NOT NULL DEFAULT '{}'
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_resources_subject ON resources(subject);
+                    CREATE INDEX IF NOT EXISTS idx_resources_grade_group ON resources(grade_group);
+                    CREATE INDEX IF NOT EXISTS idx_resources_area ON resources(area);
+                    CREATE INDEX IF NOT EXISTS idx_resources_upload_date ON resources(upload_date);
+
+                    CREATE TABLE IF NOT EXISTS resource_keywords (
+                        resource_seq INTEGER NOT NULL REFERENCES resources(seq) ON DELETE CASCADE,
+                        keyword TEXT NOT NULL,
+                        PRIMARY KEY (resource_seq, keyword)
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_resource_keywords_keyword ON resource_keywords(keyword);
+
+                    CREATE TABLE IF NOT EXISTS store_info (
+                        key TEXT PRIMARY KEY,
+                        value TEXT
+                    );
+                """)
+            if version < 3:
+                # 같은 내용의 파일(blob)을 몇 개의 자료가 쓰고 있는지 기록
+                self._conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS blobs (
+                        name TEXT PRIMARY KEY,
+                        refcount INTEGER NOT NULL
+                    ) WITHOUT ROWID;
+                """)
+            if version < 4:
+                # 통계 탭용 집계 (업로드/삭제 때마다 갱신)
+                self._conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS aggregates (
+                        dimension TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        count INTEGER NOT NULL,
+                        PRIMARY KEY (dimension, value)
+                    ) WITHOUT ROWID;
+                    CREATE INDEX IF NOT EXISTS idx_aggregates_count ON aggregates(dimension, count);
+                """)
+                self._write_stats(compute_stats(self._select()))
+            if version < 5:
+                # 목록 정렬은 MetadataFrame 에서 하므로 예전 정렬용 색인(버전 2)은 지움
+                self._conn.executescript("""
+                    DROP INDEX IF EXISTS idx_resources_title;
+                    DROP INDEX IF EXISTS idx_resources_file_size;
+                """)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _row_to_item(self, row):
+        item = {field: row[field] for field in FIELDS}
+        item["keywords"] = json.loads(row["keywords"])
+        item.update(json.loads(row["extra"]))
+        return item
+
+    def _insert(self, item):
+        extra = {k: v for k, v in item.items() if k not in FIELDS and k != "keywords"}
+        keywords = list(item.get("keywords", []))
+        cur = self._conn.execute(
+            f"INSERT INTO resources ({', '.join(FIELDS)}, keywords, extra) "
+            f"VALUES ({', '.join('?' for _ in FIELDS)}, ?, ?)",
+            [item.get(field) for field in FIELDS]
+            + [json.dumps(keywords, ensure_ascii=False), json.dumps(extra, ensure_ascii=False)]
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO resource_keywords (resource_seq, keyword) VALUES (?, ?)",
+            [(cur.lastrowid, kw) for kw in keywords]
+        )
+        if item.get("blob"):
+            self._conn.execute(
+                "INSERT INTO blobs (name, refcount) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET refcount = refcount + 1",
+                (item["blob"],)
+            )
+        self._apply_stats(item, sign=1)
+
+    def _apply_stats(self, item, sign):
+        deltas = stat_deltas(item)
+        self._conn.executemany(
+            "INSERT INTO aggregates (dimension, value, count) VALUES (?, ?, ?) "
+            "ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count",
+            [(dimension, value, sign * amount) for dimension, value, amount in deltas]
+        )
+        self._conn.executemany(
+            "DELETE FROM aggregates WHERE dimension = ? AND value = ? AND count = 0",
+            [(dimension, value) for dimension, value, _ in deltas if dimension != "total"]
+        )
+
+    def _write_stats(self, counts):
+        self._conn.execute("DELETE FROM aggregates")
+        self._conn.executemany(
+            "INSERT INTO aggregates (dimension, value, count) VALUES (?, ?, ?)",
+            [(dimension, value, count) for (dimension, value), count in counts.items()]
+        )
+
+    def _select(self, where="", params=()):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM resources {where} ORDER BY seq", params
+            ).fetchall()
+        return [self._row_to_item(row) for row in rows]
+
+    def all(self):
+        return self._select()
+
+    def get(self, file_id):
+        items = self._select("WHERE id = ?", (file_id,))
+        return items[0] if items else None
+
+    def _bump_version(self):
+        self._conn.execute(
+            "INSERT INTO store_info (key, value) VALUES ('version', '1') "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def add(self, item):
+        with self._lock, self._conn:
+            self._insert(item)
+            self._bump_version()
+
+    def add_many(self, items):
+        with self._lock, self._conn:
+            for item in items:
+                self._insert(item)
+            self._bump_version()
+
+    def _delete(self, file_id):
+        row = self._conn.execute("SELECT * FROM resources WHERE id = ?", (file_id,)).fetchone()
+        if row is None:
+            return None
+        item = self._row_to_item(row)
+        self._conn.execute("DELETE FROM resources WHERE id = ?", (file_id,))
+        self._apply_stats(item, sign=-1)
+        blob = item.get("blob")
+        if blob:
+            self._conn.execute("UPDATE blobs SET refcount = refcount - 1 WHERE name = ?", (blob,))
+            self._conn.execute("DELETE FROM blobs WHERE name = ? AND refcount <= 0", (blob,))
+        return item
+
+    def _update(self, item):
+        row = self._conn.execute("SELECT * FROM resources WHERE id = ?", (item['id'],)).fetchone()
+        if row is None:
+            return False
+        old = self._row_to_item(row)
+        extra = {k: v for k, v in item.items() if k not in FIELDS and k != "keywords"}
+        keywords = list(item.get("keywords", []))
+        # seq(업로드 순서)는 그대로 두고 내용만 바꿈
+        self._conn.execute(
+            f"UPDATE resources SET {', '.join(f'{field} = ?' for field in FIELDS)}, keywords = ?, extra = ? "
+            f"WHERE seq = ?",
+            [item.get(field) for field in FIELDS]
+            + [json.dumps(keywords, ensure_ascii=False), json.dumps(extra, ensure_ascii=False), row["seq"]]
+        )
+        self._conn.execute("DELETE FROM resource_keywords WHERE resource_seq = ?", (row["seq"],))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO resource_keywords (resource_seq, keyword) VALUES (?, ?)",
+            [(row["seq"], kw) for kw in keywords]
+        )
+        self._apply_stats(old, sign=-1)
+        self._apply_stats(item, sign=1)
+        return True
+
+    def remove(self, file_id):
+        with self._lock, self._conn:
+            if self._delete(file_id) is None:
+                return False
+            self._bump_version()
+            return True
+
+    def remove_many(self, ids):
+        with self._lock, self._conn:
+            removed = [item for item in map(self._delete, dict.fromkeys(ids)) if item is not None]
+            if removed:
+                self._bump_version()
+            return removed
+
+    def update_many(self, items):
+        with self._lock, self._conn:
+            updated = sum(1 for item in items if self._update(item))
+            if updated:
+                self._bump_version()
+            return updated
+
+    def blob_refcount(self, blob):
+        with self._lock:
+            row = self._conn.execute("SELECT refcount FROM blobs WHERE name = ?", (blob,)).fetchone()
+        return row["refcount"] if row else 0
+
+    def stats(self, top_keywords=10):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dimension, value, count FROM aggregates WHERE dimension != 'keyword'"
+            ).fetchall()
+            rows += self._conn.execute(
+                "SELECT dimension, value, count FROM aggregates WHERE dimension = 'keyword' "
+                "ORDER BY count DESC LIMIT ?", (top_keywords,)
+            ).fetchall()
+        return summarize(Counter({(row["dimension"], row["value"]): row["count"] for row in rows}), top_keywords)
+
+    def stat_counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT dimension, value, count FROM aggregates").fetchall()
+        return Counter({(row["dimension"], row["value"]): row["count"] for row in rows})
+
+    def rebuild_stats(self):
+        with self._lock, self._conn:
+            self._write_stats(compute_stats(self._select()))
+
+    def version(self):
+        return int(self.get_info("version") or 0)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+
+    def get_many(self, ids):
+        items_by_id = {}
+        for i in range(0, len(ids), _ID_BATCH):
+            batch = ids[i:i + _ID_BATCH]
+            for item in self._select(f"WHERE id IN ({', '.join('?' for _ in batch)})", batch):
+                items_by_id[item['id']] = item
+        return [items_by_id[file_id] for file_id in ids if file_id in items_by_id]
+
+    def get_info(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_info WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_info(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO store_info (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class MetadataCache:
+    """한 프로세스의 모든 세션이 함께 쓰는 메타데이터 캐시
+    저장소의 version()이 바뀌면 다시 읽고, 쓰기는 자물쇠로 한 번에 하나씩 처리합니다."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self._version = None
+        self._items_by_id = {}
+        self._ids_by_blob = {}
+        self._frame = None
+
+    def _refresh(self):
+        version = self.store.version()
+        if version != self._version:
+            self._items_by_id = {}
+            self._ids_by_blob = {}
+            for item in self.store.all():
+                self._index(item)
+            self._version = version
+            self._frame = None
+
+    def _index(self, item):
+        self._frame = None
+        self._items_by_id[item['id']] = item
+        if item.get('blob'):
+            self._ids_by_blob.setdefault(item['blob'], set()).add(item['id'])
+
+    def _unindex(self, file_id):
+        self._frame = None
+        item = self._items_by_id.pop(file_id, None)
+        if item is not None and item.get('blob'):
+            ids = self._ids_by_blob.get(item['blob'], set())
+            ids.discard(file_id)
+            if not ids:
+                self._ids_by_blob.pop(item['blob'], None)
+
+    def _after_write(self, version_before):
+        # 우리 쓰기 한 번만 반영된 경우에만 캐시를 그대로 두고, 아니면 다음 읽기 때 다시 읽음
+        version = self.store.version()
+        self._version = version if version == version_before + 1 else None
+
+    def items(self):
+        """모든 자료를 업로드 순서대로 반환합니다."""
+        with self._lock:
+            self._refresh()
+            return list(self._items_by_id.values())
+
+    def get_many(self, ids):
+        """주어진 id 순서대로 자료를 반환합니다. 없는 id는 건너뜁니다."""
+        with self._lock:
+            self._refresh()
+            return [self._items_by_id[file_id] for file_id in ids if file_id in self._items_by_id]
+
+    def by_blob(self, blob):
+        """같은 파일(blob)을 가리키는 자료들을 반환합니다."""
+        with self._lock:
+            self._refresh()
+            return [self._items_by_id[file_id] for file_id in self._ids_by_blob.get(blob, ())]
+
+    def frame(self):
+        """열 단위 표(portfolio_frame.MetadataFrame)를 반환합니다. 자료가 바뀐 뒤 처음 부를 때만 다시 만듭니다."""
+        with self._lock:
+            self._refresh()
+            if self._frame is None:
+                self._frame = MetadataFrame(self._items_by_id.values())
+            return self._frame
+
+    def add(self, item):
+        """저장소에 자료를 추가하고 캐시에도 반영합니다."""
+        with self._lock:
+            self._refresh()
+            version_before = self._version
+            self.store.add(item)
+            self._index(item)
+            self._after_write(version_before)
+
+    def remove_many(self, ids):
+        """저장소에서 여러 자료를 한 번에 삭제하고 캐시에서도 뺍니다. 삭제한 자료 목록을 반환합니다."""
+        with self._lock:
+            self._refresh()
+            version_before = self._version
+            removed = self.store.remove_many(ids)
+            for item in removed:
+                self._unindex(item['id'])
+            self._after_write(version_before)
+            return removed
+
+    def update_many(self, items):
+        """저장소에서 여러 자료의 내용을 한 번에 바꾸고 캐시에도 반영합니다. 바꾼 자료 수를 반환합니다."""
+        with self._lock:
+            self._refresh()
+            version_before = self._version
+            items = [item for item in items if item['id'] in self._items_by_id]
+            updated = self.store.update_many(items)
+            for item in items:
+                # 같은 id를 덮어쓰므로 dict 순서(업로드 순서)는 그대로
+                self._index(item)
+            self._after_write(version_before)
+            return updated
+
+
+def migrate_json_to_sqlite(json_path, store):
+    """기존 metadata.json 을 SQLite 저장소로 한 번만 옮깁니다. 옮긴 자료 수를 반환합니다."""
+    log_path = os.path.splitext(json_path)[0] + ".log"
+    if store.get_info("json_migrated") or not (os.path.exists(json_path) or os.path.exists(log_path)):
+        return 0
+    items = JsonMetadataStore(json_path).all()
+    existing = {item['id'] for item in store.all()}
+    new_items = [item for item in items if item['id'] not in existing]
+    store.add_many(new_items)
+    store.set_info("json_migrated", json_path)
+    return len(new_items)
+
+
+def open_store(data_dir=DATA_DIR, backend=DEFAULT_BACKEND):
+    """설정된 백엔드로 메타데이터 저장소를 엽니다. SQLite는 처음 열 때 JSON 자료를 옮겨옵니다."""
+    os.makedirs(data_dir, exist_ok=True)
+    json_path = os.path.join(data_dir, METADATA_FILE_NAME)
+    if backend == "json":
+        return JsonMetadataStore(json_path)
+    if backend == "sqlite":
+        store = SqliteMetadataStore(os.path.join(data_dir, DB_FILE_NAME))
+        migrate_json_to_sqlite(json_path, store)
+        return store
+    raise ValueError(f"알 수 없는 저장소 백엔드입니다: {backend}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        data_dir = sys.argv[2] if len(sys.argv) >= 3 else DATA_DIR
+        store = SqliteMetadataStore(os.path.join(data_dir, DB_FILE_NAME))
+        moved = migrate_json_to_sqlite(os.path.join(data_dir, METADATA_FILE_NAME), store)
+        print(f"✅ {moved}개의 자료를 SQLite 저장소로 옮겼습니다. (총 {store.count()}개)")
+    else:
+        print("사용법: python portfolio_store.py migrate [데이터 폴더]")
@@ -0,0 +1,168 @@
+"""
+교사 포트폴리오 미리보기(썸네일) 생성
+업로드가 끝나면 백그라운드 작업 스레드가 작은 미리보기 이미지를 만들어 files/thumbs 폴더에 저장합니다.
+자료 목록은 이 작은 이미지만 보여주므로 원본 파일을 열지 않습니다.
+
+- jpg, png: 이미지를 줄여서 저장
+- pdf: 첫 페이지 (PyMuPDF 또는 pdftoppm 이 있을 때)
+- docx, pptx: 파일 안에 들어 있는 미리보기 이미지나 첫 번째 그림
+- mp4: 1초 지점 화면 (ffmpeg 가 있을 때)
+"""
+import io
+import os
+import shutil
+import zipfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from portfolio_files import local_blob, resolve_path, shard_path
+
+try:
+    import fitz  # PyMuPDF (선택)
+except ImportError:
+    fitz = None
+
+THUMB_DIR_NAME = "thumbs"
+THUMB_SIZE = (240, 240)
+MAX_WORKERS = 2
+
+
+def thumbnail_path(files_dir, file_name):
+    """파일의 미리보기 이미지 경로를 반환합니다. (files 폴더처럼 나눈 폴더, 예전 위치도 찾음)"""
+    return resolve_path(os.path.join(files_dir, THUMB_DIR_NAME), file_name + ".jpg")
+
+
+def remove_thumbnail(files_dir, file_name):
+    """파일의 미리보기 이미지를 (나눈 폴더, 예전 위치 모두) 지웁니다."""
+    thumbs_dir = os.path.join(files_dir, THUMB_DIR_NAME)
+    for path in (shard_path(thumbs_dir, file_name + ".jpg"), os.path.join(thumbs_dir, file_name + ".jpg")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+
+
+def _save_image(image, dest_path):
+    image.thumbnail(THUMB_SIZE)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    tmp_path = dest_path + ".tmp"
+    image.save(tmp_path, "JPEG", quality=80)
+    os.replace(tmp_path, dest_path)
+
+
+def _office_image(src_path):
+    """docx/pptx 안의 미리보기 이미지(없으면 첫 번째 그림)를 읽습니다."""
+    with zipfile.ZipFile(src_path) as z:
+        names = z.namelist()
+        candidates = [n for n in names if n.lower() in ("docprops/thumbnail.jpeg", "docprops/thumbnail.png")]
+        candidates += sorted(n for n in names
+                             if n.startswith(("ppt/media/", "word/media/"))
+                             and n.lower().endswith((".png", ".jpg", ".jpeg")))
+        for name in candidates:
+            try:
+                image = Image.open(io.BytesIO(z.read(name)))
+                image.load()
+                return image
+            except OSError:
+                continue
+    return None
+
+
+def _pdf_image(src_path):
+    """PDF 첫 페이지를 이미지로 바꿉니다."""
+    if fitz is not None:
+        with fitz.open(src_path) as doc:
+            if doc.page_count:
+                pix = doc[0].get_pixmap(dpi=48)
+                return Image.open(io.BytesIO(pix.tobytes("png")))
+        return None
+    if shutil.which("pdftoppm"):
+        result = subprocess.run(
+            ["pdftoppm", "-png", "-r", "48", "-f", "1", "-l", "1", "-singlefile", src_path, "-"],
+            capture_output=True, timeout=60
+        )
+        if result.returncode == 0 and result.stdout:
+            return Image.open(io.BytesIO(result.stdout))
+    return None
+
+
+def _video_image(src_path):
+    """동영상 1초 지점 화면을 이미지로 바꿉니다."""
+    if not shutil.which("ffmpeg"):
+        return None
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-ss", "1", "-i", src_path, "-frames:v", "1",
+         "-vf", f"scale={THUMB_SIZE[0]}:-1", "-f", "image2pipe", "-vcodec", "png", "-"],
+        capture_output=True, timeout=120
+    )
+    if result.returncode == 0 and result.stdout:
+        return Image.open(io.BytesIO(result.stdout))
+    return None
+
+
+def generate_thumbnail(src_path, dest_path):
+    """원본 파일로 미리보기 이미지를 만듭니다. 만들었으면 True를 반환합니다."""
+    ext = os.path.splitext(src_path)[1].lower().lstrip(".")
+    try:
+        if ext in ("jpg", "jpeg", "png"):
+            image = Image.open(src_path)
+        elif ext in ("docx", "pptx"):
+            image = _office_image(src_path)
+        elif ext == "pdf":
+            image = _pdf_image(src_path)
+        elif ext == "mp4":
+            image = _video_image(src_path)
+        else:
+            return False
+        if image is None:
+            return False
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        _save_image(image, dest_path)
+        return True
+    except (OSError, ValueError, zipfile.BadZipFile, subprocess.SubprocessError):
+        return False
+
+
+class ThumbnailWorker:
+    """미리보기 이미지를 백그라운드 스레드에서 만드는 작업자"""
+
+    def __init__(self, files_dir, max_workers=MAX_WORKERS):
+        self.files_dir = files_dir
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail")
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def _run(self, file_name):
+        try:
+            dest_path = thumbnail_path(self.files_dir, file_name)
+            if not os.path.exists(dest_path):
+                with local_blob(self.files_dir, file_name) as src_path:
+                    generate_thumbnail(src_path, dest_path)
+        finally:
+            with self._lock:
+                self._pending.discard(file_name)
+
+    def submit(self, file_name):
+        """파일의 미리보기 생성을 예약합니다. 이미 예약된 파일은 건너뜁니다."""
+        with self._lock:
+            if file_name in self._pending:
+                return
+            self._pending.add(file_name)
+        self._pool.submit(self._run, file_name)
+
+    def backfill(self, file_names):
+        """미리보기가 없는 파일들을 백그라운드에서 찾아 생성을 예약합니다."""
+        def run():
+            for file_name in file_names:
+                if not os.path.exists(thumbnail_path(self.files_dir, file_name)):
+                    self.submit(file_name)
+        threading.Thread(target=run, name="thumbnail-backfill", daemon=True).start()
+
+    def pending(self):
+        """아직 만들고 있는 미리보기 수를 반환합니다."""
+        with self._lock:
+            return len(self._pending)
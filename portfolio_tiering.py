@@ -0,0 +1,193 @@
+"""
+교사 포트폴리오 저장 계층 관리 (자주 쓰지 않는 파일 압축 보관)
+파일(blob)마다 마지막으로 내려받은 시각과 횟수를 teacher_data/tiers.db 에 기록하고,
+오랫동안 내려받지 않은 문서 파일은 백그라운드 작업이 압축해서 보관합니다.
+압축은 zstandard 패키지가 있으면 zstd, 없으면 gzip을 씁니다. 압축해도 크기가 거의 줄지 않는 파일은 그대로 둡니다.
+압축된 파일은 내려받을 때 portfolio_files.open_blob 이 조각 단위로 풀어서 보냅니다.
+
+    python portfolio_tiering.py status                  # 원래 크기 / 실제 디스크 사용량
+    python portfolio_tiering.py run [--days 30]         # 지금 한 번 압축 작업 실행
+"""
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+from portfolio_files import blob_path, blob_size, physical_size, compress_blob, is_compressed, item_file_name
+
+# 이 기간(일) 동안 내려받지 않은 파일을 압축
+COLD_DAYS = float(os.environ.get("PORTFOLIO_COLD_DAYS", "30") or 30)
+# 백그라운드 압축 작업 간격 (초)
+TIER_INTERVAL = float(os.environ.get("PORTFOLIO_TIER_INTERVAL", "3600") or 3600)
+# 압축할 형식 (이미지/영상/음성은 이미 압축되어 있어 제외)
+COLD_EXTENSIONS = (".hwp", ".hwpx", ".docx", ".pdf", ".pptx")
+# 한 번에 압축할 최대 파일 수
+BATCH_SIZE = 200
+
+# codec 값: NULL=아직 시도 안 함, "plain"=압축해도 줄지 않아 그대로 둠, "gz"/"zst"=압축 보관
+PLAIN = "plain"
+
+
+def _codec(name, path):
+    if is_compressed(path):
+        return path.rsplit(".", 1)[-1]
+    # 압축 대상이 아닌 형식은 처음부터 "plain"으로 두어 압축 작업이 고르지 않게 함
+    return None if os.path.splitext(name)[1].lower() in COLD_EXTENSIONS else PLAIN
+
+
+class BlobTiering:
+    """파일별 접근 기록과 압축 보관 상태를 SQLite에 저장하고 오래된 파일을 압축하는 관리자"""
+
+    def __init__(self, path, files_dir):
+        self.path = path
+        self.files_dir = files_dir
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    name TEXT PRIMARY KEY,
+                    logical_size INTEGER NOT NULL,
+                    physical_size INTEGER NOT NULL,
+                    codec TEXT,
+                    last_access REAL NOT NULL,
+                    access_count INTEGER NOT NULL DEFAULT 0
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_blobs_access ON blobs(codec, last_access);
+            """)
+        self._thread = None
+
+    def _register(self, name, last_access):
+        try:
+            logical = blob_size(self.files_dir, name)
+        except FileNotFoundError:
+            return
+        codec = _codec(name, blob_path(self.files_dir, name))
+        self._conn.execute(
+            "INSERT OR IGNORE INTO blobs (name, logical_size, physical_size, codec, last_access) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (name, logical, physical_size(self.files_dir, name), codec, last_access)
+        )
+
+    def register(self, name):
+        """새로 올린 파일을 기록합니다. 이미 기록된 파일(같은 내용)은 접근한 것으로 칩니다."""
+        with self._lock, self._conn:
+            self._register(name, time.time())
+        self.touch(name, count=False)
+
+    def backfill(self, names):
+        """아직 기록되지 않은 파일을 기록합니다. 마지막 접근 시각은 파일 수정 시각으로 둡니다."""
+        with self._lock:
+            known = {row[0] for row in self._conn.execute("SELECT name FROM blobs")}
+        missing = [name for name in names if name not in known]
+        if not missing:
+            return 0
+        with self._lock, self._conn:
+            for name in missing:
+                try:
+                    mtime = os.path.getmtime(blob_path(self.files_dir, name))
+                except OSError:
+                    continue
+                self._register(name, mtime)
+        return len(missing)
+
+    def touch(self, name, count=True):
+        """파일을 내려받았다고 기록합니다."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE blobs SET last_access = ?, access_count = access_count + ? WHERE name = ?",
+                (time.time(), 1 if count else 0, name)
+            )
+
+    def forget(self, name):
+        """삭제한 파일의 기록을 지웁니다."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM blobs WHERE name = ?", (name,))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def totals(self):
+        """(원래 크기 합계, 실제 디스크 사용량 합계, 압축 보관 중인 파일 수)를 반환합니다."""
+        with self._lock:
+            logical, physical, compressed = self._conn.execute(
+                "SELECT COALESCE(SUM(logical_size), 0), COALESCE(SUM(physical_size), 0), "
+                "COUNT(CASE WHEN codec IS NOT NULL AND codec != ? THEN 1 END) FROM blobs", (PLAIN,)
+            ).fetchone()
+        return logical, physical, compressed
+
+    def run_once(self, idle_days=COLD_DAYS, limit=BATCH_SIZE):
+        """idle_days 동안 내려받지 않은 문서 파일을 압축합니다. 줄어든 바이트 수를 반환합니다."""
+        cutoff = time.time() - idle_days * 86400
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, logical_size FROM blobs WHERE codec IS NULL AND last_access < ? "
+                "ORDER BY last_access LIMIT ?", (cutoff, limit)
+            ).fetchall()
+        saved = 0
+        for name, logical in rows:
+            try:
+                compressed = compress_blob(self.files_dir, name)
+            except FileNotFoundError:
+                # 압축하는 사이에 삭제됨
+                self.forget(name)
+                continue
+            with self._lock, self._conn:
+                if compressed is None:
+                    self._conn.execute("UPDATE blobs SET codec = ? WHERE name = ?", (PLAIN, name))
+                    continue
+                self._conn.execute(
+                    "UPDATE blobs SET codec = ?, physical_size = ? WHERE name = ?",
+                    (_codec(name, blob_path(self.files_dir, name)), compressed, name)
+                )
+            saved += logical - compressed
+        return saved
+
+    def start(self, interval=TIER_INTERVAL, idle_days=COLD_DAYS):
+        """압축 작업을 interval 초마다 백그라운드 스레드에서 실행합니다."""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.run_once(idle_days)
+                except Exception:
+                    # 다음 주기에 다시 시도
+                    pass
+                time.sleep(interval)
+        self._thread = threading.Thread(target=loop, name="blob-tiering", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from portfolio_store import open_store, DATA_DIR
+
+    parser = argparse.ArgumentParser(description="오랫동안 내려받지 않은 파일을 압축 보관합니다.")
+    parser.add_argument("command", choices=["run", "status"])
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--days", type=float, default=COLD_DAYS, help=f"며칠 동안 안 쓴 파일을 압축할지 (기본: {COLD_DAYS:g})")
+    args = parser.parse_args()
+    files_dir = os.path.join(args.data_dir, "files")
+    if not os.path.isdir(files_dir):
+        print(f"❌ 폴더를 찾을 수 없습니다: {files_dir}")
+        sys.exit(1)
+    tiering = BlobTiering(os.path.join(args.data_dir, "tiers.db"), files_dir)
+    store = open_store(args.data_dir)
+    tiering.backfill({item_file_name(item) for item in store.all()})
+    if args.command == "run":
+        saved = tiering.run_once(args.days, limit=tiering.count())
+        print(f"✅ {saved / (1024*1024):.1f} MB를 줄였습니다.")
+    logical, physical, compressed = tiering.totals()
+    print(f"원래 크기 {logical / (1024*1024):.1f} MB / 실제 사용량 {physical / (1024*1024):.1f} MB "
+          f"(압축 보관 {compressed}개)")
@@ -0,0 +1,189 @@
+"""
+교사 포트폴리오 교육과정 트리
+자료를 과목 > 학년군 > 영역 > 단원 > 차시 트리로 묶고, 노드마다 하위 자료 수와 용량을 미리 계산해
+teacher_data/tree.db 에 저장합니다. 업로드/삭제 때마다 그 자료가 지나는 노드(최대 6개)만 갱신하고,
+탐색할 때는 한 노드의 바로 아래 자식만 읽으므로 자료가 아무리 많아도 전체 목록을 읽지 않습니다.
+"""
+import sqlite3
+import threading
+
+# 트리 단계 (위에서부터)
+LEVELS = ("subject", "grade_group", "area", "unit", "lesson")
+LEVEL_NAMES = ("과목", "학년군", "영역", "단원", "차시")
+EMPTY_NAME = "(미지정)"
+
+# 노드 경로 구분자 (자료 이름에 쓰이지 않는 문자)
+_SEP = "\x1f"
+
+
+def node_path(names):
+    """이름 목록을 노드 경로 문자열로 바꿉니다. 빈 목록은 루트입니다."""
+    return _SEP.join(names)
+
+
+def split_path(path):
+    return path.split(_SEP) if path else []
+
+
+def item_names(item):
+    """자료가 속한 과목/학년군/영역/단원/차시 이름 목록을 반환합니다."""
+    return [" ".join((item.get(level) or "").split()) or EMPTY_NAME for level in LEVELS]
+
+
+class CurriculumTree:
+    """SQLite에 저장되는 교육과정 트리 색인 (노드별 하위 자료 수/용량 포함)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS nodes (
+                    path TEXT PRIMARY KEY,
+                    parent TEXT,
+                    name TEXT NOT NULL,
+                    depth INTEGER NOT NULL,
+                    item_count INTEGER NOT NULL,
+                    total_bytes INTEGER NOT NULL
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_nodes_parent ON nodes(parent, name);
+                CREATE TABLE IF NOT EXISTS node_items (
+                    item_id TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    file_size INTEGER NOT NULL
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_node_items_path ON node_items(path, item_id);
+                CREATE TABLE IF NOT EXISTS index_info (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                ) WITHOUT ROWID;
+            """)
+
+    def _apply(self, names, count_delta, bytes_delta):
+        # 루트부터 차시 노드까지 경로 위의 모든 노드에 더하고, 자료가 없어진 노드는 지움
+        for depth in range(len(names) + 1):
+            path = node_path(names[:depth])
+            parent = node_path(names[:depth - 1]) if depth else None
+            name = names[depth - 1] if depth else ""
+            self._conn.execute(
+                "INSERT INTO nodes (path, parent, name, depth, item_count, total_bytes) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET item_count = item_count + excluded.item_count, "
+                "total_bytes = total_bytes + excluded.total_bytes",
+                (path, parent, name, depth, count_delta, bytes_delta)
+            )
+        if count_delta < 0:
+            paths = [node_path(names[:depth]) for depth in range(1, len(names) + 1)]
+            self._conn.execute(
+                f"DELETE FROM nodes WHERE item_count <= 0 AND path IN ({', '.join('?' for _ in paths)})", paths
+            )
+
+    def _add(self, item):
+        self._remove(item["id"])
+        names = item_names(item)
+        size = item.get("file_size", 0) or 0
+        self._conn.execute(
+            "INSERT INTO node_items (item_id, path, file_size) VALUES (?, ?, ?)",
+            (item["id"], node_path(names), size)
+        )
+        self._apply(names, 1, size)
+
+    def _remove(self, item_id):
+        row = self._conn.execute("SELECT path, file_size FROM node_items WHERE item_id = ?", (item_id,)).fetchone()
+        if row is None:
+            return False
+        self._conn.execute("DELETE FROM node_items WHERE item_id = ?", (item_id,))
+        self._apply(split_path(row[0]), -1, -row[1])
+        return True
+
+    def add(self, item):
+        """자료 한 건을 트리에 넣습니다. 이미 있으면 새 위치로 옮깁니다."""
+        with self._lock, self._conn:
+            self._add(item)
+
+    def add_many(self, items):
+        """여러 자료를 한 트랜잭션으로 트리에 넣습니다."""
+        with self._lock, self._conn:
+            for item in items:
+                self._add(item)
+
+    def remove(self, item_id):
+        """자료 한 건을 트리에서 뺍니다."""
+        with self._lock, self._conn:
+            return self._remove(item_id)
+
+    def remove_many(self, item_ids):
+        """여러 자료를 한 트랜잭션으로 트리에서 뺍니다."""
+        with self._lock, self._conn:
+            for item_id in item_ids:
+                self._remove(item_id)
+
+    def rebuild(self, items, version=None):
+        """전체 자료로 트리를 처음부터 다시 만듭니다.
+        version 을 주면 그 저장소 버전까지 반영했다고 함께 기록합니다."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM nodes")
+            self._conn.execute("DELETE FROM node_items")
+            for item in items:
+                self._add(item)
+            if version is not None:
+                self._mark_synced(version)
+
+    def _mark_synced(self, version):
+        self._conn.execute(
+            "INSERT INTO index_info (key, value) VALUES ('store_version', ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (str(version),)
+        )
+
+    def mark_synced(self, version):
+        """메타데이터 저장소의 version() 까지 반영했다고 기록합니다."""
+        with self._lock, self._conn:
+            self._mark_synced(version)
+
+    def synced_version(self):
+        """마지막으로 반영한 메타데이터 저장소의 version() 을 반환합니다. 기록이 없으면 None입니다."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM index_info WHERE key = 'store_version'").fetchone()
+        return int(row[0]) if row else None
+
+    def count(self):
+        """트리에 들어 있는 자료 수를 반환합니다."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM node_items").fetchone()[0]
+
+    def node(self, path=""):
+        """노드의 (이름, 하위 자료 수, 하위 용량)을 반환합니다. 없는 노드는 None입니다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name, item_count, total_bytes FROM nodes WHERE path = ?", (path,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def children(self, path="", offset=0, limit=100):
+        """바로 아래 자식 노드를 이름순으로 (이름, 경로, 하위 자료 수, 하위 용량) 목록으로 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, path, item_count, total_bytes FROM nodes WHERE parent = ? "
+                "ORDER BY name LIMIT ? OFFSET ?", (path, limit, offset)
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def child_count(self, path=""):
+        """바로 아래 자식 노드 수를 반환합니다."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM nodes WHERE parent = ?", (path,)).fetchone()[0]
+
+    def item_ids(self, path, offset=0, limit=20):
+        """차시 노드에 들어 있는 자료 id를 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id FROM node_items WHERE path = ? ORDER BY item_id LIMIT ? OFFSET ?",
+                (path, limit, offset)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,10 +1,25 @@
 import streamlit as st
 import pandas as pd
 import os
-import shutil
+import math
 from datetime import datetime
-import json
-from pathlib import Path
+import uuid
+from portfolio_store import open_store, MetadataCache, SORT_KEYS
+from portfolio_search import SearchIndex
+from portfolio_recommend import RecommendationIndex
+from portfolio_thumbnails import ThumbnailWorker, thumbnail_path, remove_thumbnail
+from portfolio_extract import TextStore, TextExtractor
+from portfolio_tree import CurriculumTree, LEVELS, LEVEL_NAMES, node_path
+from portfolio_tiering import BlobTiering
+import app_metrics
+from app_metrics import section
+from portfolio_files import (
+    lazy_file_reader, should_stream, should_stream_compressed, stream_url, start_stream_server,
+    store_blob, remove_blob, item_file_name, blob_lock
+)
+
+# 실행 시간 측정 시작 (APP_METRICS=1 일 때만)
+app_metrics.begin_run("portfolio")
 
 # 페이지 설정
 st.set_page_config(
@@ -16,54 +31,212 @@ st.set_page_config(
 # 데이터 저장 경로
 DATA_DIR = "teacher_data"
 FILES_DIR = os.path.join(DATA_DIR, "files")
-METADATA_FILE = os.path.join(DATA_DIR, "metadata.json")
+
+# 자료 목록 한 페이지에 보여줄 자료 수
+PAGE_SIZES = [10, 20, 50, 100]
+DEFAULT_PAGE_SIZE = 20
+
+# 교육과정 탐색에서 한 번에 보여줄 항목 수
+TREE_PAGE_SIZE = 50
 
 # 디렉토리 생성
 os.makedirs(FILES_DIR, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# 메타데이터 로드/저장 함수
-def load_metadata():
-    if os.path.exists(METADATA_FILE):
-        with open(METADATA_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+# 메타데이터 저장소 (기본: SQLite, 기존 metadata.json 은 처음 열 때 자동으로 옮겨짐)
+@st.cache_resource
+def get_store():
+    return open_store(DATA_DIR)
+
+# 문서 본문 저장소 (PDF/Word/PowerPoint 에서 뽑은 글자를 압축해서 보관)
+@st.cache_resource
+def get_text_store():
+    return TextStore(os.path.join(DATA_DIR, "texts.db"))
+
+# 검색 색인 (마지막으로 반영한 저장소 버전이 지금과 다르면 처음 한 번 전체를 다시 색인)
+# 자료를 저장한 뒤 색인에 쓰기 전에 멈췄거나, 다른 프로그램(portfolio_import.py)이 자료를 고친 경우
+@st.cache_resource
+def get_search_index():
+    index = SearchIndex(os.path.join(DATA_DIR, "search.db"))
+    version = get_store().version()
+    if index.synced_version() != version:
+        text_store = get_text_store()
+        index.rebuild((dict(item, body=text_store.get(item_file_name(item))) for item in get_store().all()),
+                      version)
+    return index
+
+# 큰 동영상/음성 파일용 스트리밍 서버 (PORTFOLIO_STREAM_PORT 를 설정했을 때만 실행)
+@st.cache_resource
+def get_stream_server():
+    return start_stream_server(FILES_DIR, on_access=get_blob_tiering().touch)
+
+# 연계 추천 색인 (자료마다 비슷한 자료 목록을 미리 계산해 둠)
+@st.cache_resource
+def get_recommend_index():
+    index = RecommendationIndex(os.path.join(DATA_DIR, "recommend.db"))
+    version = get_store().version()
+    if index.synced_version() != version:
+        index.rebuild(get_store().all(), version)
+    return index
+
+# 교육과정 트리 색인 (과목 > 학년군 > 영역 > 단원 > 차시, 노드별 자료 수/용량을 미리 계산해 둠)
+@st.cache_resource
+def get_curriculum_tree():
+    tree = CurriculumTree(os.path.join(DATA_DIR, "tree.db"))
+    version = get_store().version()
+    if tree.synced_version() != version:
+        tree.rebuild(get_store().all(), version)
+    return tree
+
+# 파일별 접근 기록 (오랫동안 내려받지 않은 문서는 백그라운드에서 압축 보관)
+@st.cache_resource
+def get_blob_tiering():
+    tiering = BlobTiering(os.path.join(DATA_DIR, "tiers.db"), FILES_DIR)
+    tiering.backfill({item_file_name(item) for item in get_store().all()})
+    tiering.start()
+    return tiering
+
+# 모든 세션이 함께 쓰는 메타데이터 캐시 (세션마다 전체 목록을 따로 들고 있지 않음)
+@st.cache_resource
+def get_metadata_cache():
+    return MetadataCache(get_store())
+
+# 미리보기 이미지 생성 작업자 (백그라운드 스레드, 처음 실행 시 없는 미리보기도 만듦)
+@st.cache_resource
+def get_thumbnail_worker():
+    worker = ThumbnailWorker(FILES_DIR)
+    worker.backfill([item_file_name(item) for item in get_metadata_cache().items()])
+    return worker
+
+# 문서 본문 추출 작업자 (별도 프로세스, 추출이 끝나면 그 파일을 쓰는 자료의 검색 색인을 갱신)
+@st.cache_resource
+def get_text_extractor():
+    cache = get_metadata_cache()
+    index = get_search_index()
+    
+    def reindex(blob, text):
+        for item in cache.by_blob(blob):
+            index.add(dict(item, body=text))
+    
+    extractor = TextExtractor(FILES_DIR, get_text_store(), on_done=reindex)
+    extractor.backfill([item_file_name(item) for item in cache.items()])
+    return extractor
+
+with section("portfolio.resources"):
+    store = get_store()
+    metadata_cache = get_metadata_cache()
+    thumbnail_worker = get_thumbnail_worker()
+    search_index = get_search_index()
+    recommend_index = get_recommend_index()
+    curriculum_tree = get_curriculum_tree()
+    text_store = get_text_store()
+    text_extractor = get_text_extractor()
+    blob_tiering = get_blob_tiering()
+    get_stream_server()
 
-def save_metadata(metadata):
-    with open(METADATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
+def mark_indexes_synced(version_before):
+    """방금 한 쓰기만큼 저장소 버전이 올랐으면 세 색인에 그 버전을 반영했다고 적어 둡니다.
+    그 사이 다른 프로그램도 자료를 고쳤다면 적지 않고, 다음 실행 때 전체를 다시 색인합니다."""
+    version = store.version()
+    if version == version_before + 1:
+        for index in (search_index, recommend_index, curriculum_tree):
+            index.mark_synced(version)
 
-# 세션 상태 초기화
-if 'metadata' not in st.session_state:
-    st.session_state.metadata = load_metadata()
+def delete_items(ids):
+    """자료 여러 건을 id로 한 번에 삭제하고 색인에서도 뺍니다. 삭제한 자료 수를 반환합니다."""
+    version_before = store.version()
+    with blob_lock:
+        # 메타데이터에서 제거 (한 번의 쓰기)
+        removed = metadata_cache.remove_many(ids)
+        # 이 파일을 쓰는 자료가 더 없을 때만 파일 삭제
+        for blob in {item_file_name(item) for item in removed}:
+            if store.blob_refcount(blob) == 0:
+                remove_blob(FILES_DIR, blob)
+                remove_thumbnail(FILES_DIR, blob)
+                text_store.remove(blob)
+                blob_tiering.forget(blob)
+    removed_ids = [item['id'] for item in removed]
+    search_index.remove_many(removed_ids)
+    recommend_index.remove_many(removed_ids)
+    curriculum_tree.remove_many(removed_ids)
+    if removed:
+        mark_indexes_synced(version_before)
+    return len(removed)
+
+def update_items(items):
+    """고친 자료 여러 건을 한 번에 저장하고 색인도 갱신합니다. 바꾼 자료 수를 반환합니다."""
+    version_before = store.version()
+    updated = metadata_cache.update_many(items)
+    search_index.add_many(dict(item, body=text_store.get(item_file_name(item))) for item in items)
+    recommend_index.update_many(items)
+    curriculum_tree.add_many(items)
+    if updated:
+        mark_indexes_synced(version_before)
+    return updated
 
 # 메인 타이틀
 st.title("📚 교사 포트폴리오 관리 시스템")
 st.markdown("**과목_학년군_영역_단원_차시별로 학습 자료를 체계적으로 관리하세요!**")
 
+# 열 단위 메타데이터 표 (필터/개수/정렬/통계를 벡터 연산으로 처리, 자료가 바뀔 때만 다시 만듦)
+with section("portfolio.frame"):
+    metadata_frame = metadata_cache.frame()
+
 # 사이드바 - 필터링 옵션
 st.sidebar.header("🔍 검색 및 필터")
 
-# 과목 선택
 subjects = ["국어", "수학", "사회", "과학", "영어", "체육", "음악", "미술", "도덕", "기타"]
-selected_subject = st.sidebar.selectbox("과목", ["전체"] + subjects)
-
-# 학년군 선택
 grade_groups = ["1-2학년", "3-4학년", "5-6학년", "중학교", "고등학교"]
-selected_grade = st.sidebar.selectbox("학년군", ["전체"] + grade_groups)
-
-# 영역 선택
 areas = ["듣기", "말하기", "읽기", "쓰기", "수와 연산", "도형", "측정", "자료와 가능성", "기타"]
-selected_area = st.sidebar.selectbox("영역", ["전체"] + areas)
+
+with section("portfolio.sidebar"):
+    # 현재 고른 필터와 검색어 (선택 상자를 그리기 전에 읽어야 다른 필터와 검색 결과를 반영한 개수를 보여줄 수 있음)
+    current_filters = {
+        field: None if st.session_state.get(key, "전체") == "전체" else st.session_state[key]
+        for field, key in (("subject", "filter_subject"), ("grade_group", "filter_grade"), ("area", "filter_area"))
+    }
+    search_term = st.session_state.get("search_term", "")
+    # 검색 결과 id (관련도 순, 목록에서도 그대로 씀)
+    search_hits = search_index.search(search_term) if search_term else None
+
+    def facet_label(field):
+        """선택지 옆에 다른 필터와 검색어를 적용했을 때의 자료 수를 붙입니다."""
+        counts = metadata_frame.facet_counts(field, ids=search_hits, **current_filters)
+        total = sum(counts.values())
+        return lambda option: f"{option} ({total if option == '전체' else counts.get(option, 0)})"
+
+    # 과목 선택
+    selected_subject = st.sidebar.selectbox("과목", ["전체"] + subjects, key="filter_subject",
+                                            format_func=facet_label("subject"))
+
+    # 학년군 선택
+    selected_grade = st.sidebar.selectbox("학년군", ["전체"] + grade_groups, key="filter_grade",
+                                          format_func=facet_label("grade_group"))
+
+    # 영역 선택
+    selected_area = st.sidebar.selectbox("영역", ["전체"] + areas, key="filter_area",
+                                         format_func=facet_label("area"))
 
 # 검색어
-search_term = st.sidebar.text_input("검색어", placeholder="제목, 단원, 키워드로 검색...")
+search_term = st.sidebar.text_input("검색어", placeholder="제목, 단원, 키워드, 문서 내용으로 검색...", key="search_term")
+
+# 성능 지표 (APP_METRICS=1 로 실행했을 때만 표시)
+if app_metrics.ENABLED:
+    with st.sidebar.expander("⏱️ 성능 지표"):
+        app_metrics.render_panel(st)
+
+# 필터 조건 ("전체"는 조건 없음)
+filters = {
+    "subject": None if selected_subject == "전체" else selected_subject,
+    "grade_group": None if selected_grade == "전체" else selected_grade,
+    "area": None if selected_area == "전체" else selected_area,
+}
 
 # 메인 컨텐츠
-tab1, tab2, tab3 = st.tabs(["📁 자료 업로드", "📋 자료 목록", "📊 통계 및 분석"])
+tab1, tab2, tab3, tab4 = st.tabs(["📁 자료 업로드", "📋 자료 목록", "📊 통계 및 분석", "🌳 교육과정 탐색"])
 
 # 탭 1: 자료 업로드
-with tab1:
+with tab1, section("portfolio.tab.upload"):
     st.header("📁 새로운 학습 자료 업로드")
     
     with st.form("upload_form"):
@@ -91,67 +264,169 @@ with tab1:
         submitted = st.form_submit_button("📤 자료 업로드")
         
         if submitted and uploaded_file is not None:
-            # 파일 정보 저장
-            file_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uploaded_file.name}"
-            file_path = os.path.join(FILES_DIR, file_id)
-            
-            # 파일 저장
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # 파일 정보 저장 (같은 초에 같은 이름으로 올려도 겹치지 않도록 임의 문자열 추가)
+            file_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}_{uploaded_file.name}"
             
-            # 메타데이터 생성
-            file_metadata = {
-                "id": file_id,
-                "original_name": uploaded_file.name,
-                "title": title,
-                "subject": subject,
-                "grade_group": grade_group,
-                "area": area,
-                "unit": unit,
-                "lesson": lesson,
-                "description": description,
-                "keywords": [kw.strip() for kw in keywords.split(",") if kw.strip()],
-                "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "file_size": uploaded_file.size,
-                "file_type": uploaded_file.type
-            }
-            
-            # 메타데이터 저장
-            st.session_state.metadata.append(file_metadata)
-            save_metadata(st.session_state.metadata)
+            # 파일 저장 (같은 내용의 파일이 이미 있으면 다시 저장하지 않음)
+            with blob_lock:
+                blob, blob_size = store_blob(uploaded_file, FILES_DIR, uploaded_file.name)
+                
+                # 메타데이터 생성
+                file_metadata = {
+                    "id": file_id,
+                    "original_name": uploaded_file.name,
+                    "title": title,
+                    "subject": subject,
+                    "grade_group": grade_group,
+                    "area": area,
+                    "unit": unit,
+                    "lesson": lesson,
+                    "description": description,
+                    "keywords": [kw.strip() for kw in keywords.split(",") if kw.strip()],
+                    "upload_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "file_size": blob_size,
+                    "file_type": uploaded_file.type,
+                    "blob": blob
+                }
+                
+                # 메타데이터 저장
+                version_before = store.version()
+                metadata_cache.add(file_metadata)
+            # 같은 파일을 전에 올린 적이 있으면 이미 뽑아 둔 본문으로 바로 색인
+            search_index.add(dict(file_metadata, body=text_store.get(blob)))
+            recommend_index.add(file_metadata)
+            curriculum_tree.add(file_metadata)
+            mark_indexes_synced(version_before)
+            blob_tiering.register(blob)
+            thumbnail_worker.submit(blob)
+            text_extractor.submit(blob)
             
             st.success(f"✅ '{title}' 자료가 성공적으로 업로드되었습니다!")
             st.balloons()
 
 # 탭 2: 자료 목록
-with tab2:
+with tab2, section("portfolio.tab.list"):
     st.header("📋 학습 자료 목록")
     
-    # 필터링된 데이터
-    filtered_data = st.session_state.metadata.copy()
+    # 정렬 및 페이지 설정
+    sort_options = (["관련도"] if search_term else []) + list(SORT_KEYS)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        sort_label = st.selectbox("정렬 기준", sort_options)
+    with col2:
+        descending = st.radio("정렬 순서", ["내림차순", "오름차순"], horizontal=True) == "내림차순"
+    with col3:
+        page_size = st.selectbox("페이지당 자료 수", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
     
-    # 필터 적용
-    if selected_subject != "전체":
-        filtered_data = [item for item in filtered_data if item['subject'] == selected_subject]
+    # 검색어가 있으면 검색 색인 결과 중 필터에 맞는 것만, 없으면 메타데이터 표에서 바로 정렬/페이지 조회
+    with section("portfolio.list.query"):
+        if search_term:
+            matched_ids = metadata_frame.filter_ids(search_hits, **filters)
+            total_count = len(matched_ids)
+        else:
+            total_count = metadata_frame.count(**filters)
     
-    if selected_grade != "전체":
-        filtered_data = [item for item in filtered_data if item['grade_group'] == selected_grade]
+        page_count = max(1, math.ceil(total_count / page_size))
+        page_number = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1)
+        offset = (page_number - 1) * page_size
     
-    if selected_area != "전체":
-        filtered_data = [item for item in filtered_data if item['area'] == selected_area]
+        if search_term and sort_label == "관련도":
+            filtered_data = metadata_cache.get_many(matched_ids[offset:offset + page_size])
+        elif search_term:
+            # 검색 결과만 다시 정렬 (검색 결과 수만큼만 읽음)
+            matched = metadata_cache.get_many(matched_ids)
+            matched.sort(key=lambda item: item[SORT_KEYS[sort_label]], reverse=descending)
+            filtered_data = matched[offset:offset + page_size]
+        else:
+            filtered_data = metadata_cache.get_many(metadata_frame.page(
+                sort_by=SORT_KEYS[sort_label], descending=descending,
+                offset=offset, limit=page_size, **filters
+            ))
     
-    if search_term:
-        filtered_data = [item for item in filtered_data if 
-                        search_term.lower() in item['title'].lower() or 
-                        search_term.lower() in item['unit'].lower() or 
-                        search_term.lower() in item['description'].lower() or
-                        any(search_term.lower() in kw.lower() for kw in item['keywords'])]
+    # 여러 자료 한꺼번에 고치기 (삭제, 키워드, 과목/학년군 옮기기를 한 번의 저장으로 처리)
+    batch_selected = st.session_state.setdefault("batch_selected", set())
+    batch_mode = st.toggle("☑️ 여러 자료 선택", key="batch_mode")
+    
+    def toggle_selected(item_id):
+        if st.session_state[f"select_{item_id}"]:
+            st.session_state.batch_selected.add(item_id)
+        else:
+            st.session_state.batch_selected.discard(item_id)
+    
+    def select_page(item_ids):
+        st.session_state.batch_selected.update(item_ids)
+    
+    def clear_selection():
+        st.session_state.batch_selected.clear()
+    
+    if "batch_notice" in st.session_state:
+        st.success(st.session_state.pop("batch_notice"))
+    
+    if batch_mode:
+        with st.container(border=True):
+            st.write(f"**선택한 자료: {len(batch_selected)}개**")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.button("이 페이지 모두 선택", on_click=select_page, args=([item['id'] for item in filtered_data],))
+            with col2:
+                st.button("선택 해제", on_click=clear_selection)
+            
+            with st.form("batch_form"):
+                batch_action = st.radio(
+                    "작업", ["🏷️ 키워드 추가", "🏷️ 키워드 바꾸기", "📦 과목/학년군 옮기기", "🗑️ 삭제"], horizontal=True
+                )
+                batch_keywords = st.text_input("키워드 (쉼표로 구분)", placeholder="예: 소중함, 가족")
+                col1, col2 = st.columns(2)
+                with col1:
+                    batch_subject = st.selectbox("옮길 과목", ["(그대로)"] + subjects)
+                with col2:
+                    batch_grade = st.selectbox("옮길 학년군", ["(그대로)"] + grade_groups)
+                batch_confirm = st.checkbox("삭제하면 되돌릴 수 없다는 것을 확인했습니다")
+                batch_submitted = st.form_submit_button("✅ 선택한 자료에 적용")
+            
+            if batch_submitted:
+                targets = metadata_cache.get_many(batch_selected)
+                new_keywords = [kw.strip() for kw in batch_keywords.split(",") if kw.strip()]
+                if not targets:
+                    st.warning("선택한 자료가 없습니다.")
+                elif batch_action == "🗑️ 삭제":
+                    if batch_confirm:
+                        st.session_state.batch_notice = f"🗑️ {delete_items([item['id'] for item in targets])}개의 자료를 삭제했습니다."
+                        batch_selected.clear()
+                        st.rerun()
+                    st.warning("삭제하려면 확인란을 체크하세요.")
+                elif batch_action == "📦 과목/학년군 옮기기":
+                    moved = {}
+                    if batch_subject != "(그대로)":
+                        moved["subject"] = batch_subject
+                    if batch_grade != "(그대로)":
+                        moved["grade_group"] = batch_grade
+                    if moved:
+                        st.session_state.batch_notice = f"📦 {update_items([dict(item, **moved) for item in targets])}개의 자료를 옮겼습니다."
+                        st.rerun()
+                    st.warning("옮길 과목이나 학년군을 고르세요.")
+                elif new_keywords:
+                    if batch_action == "🏷️ 키워드 추가":
+                        changed = [dict(item, keywords=list(dict.fromkeys(item['keywords'] + new_keywords)))
+                                   for item in targets]
+                    else:
+                        changed = [dict(item, keywords=list(dict.fromkeys(new_keywords))) for item in targets]
+                    st.session_state.batch_notice = f"🏷️ {update_items(changed)}개 자료의 키워드를 고쳤습니다."
+                    st.rerun()
+                else:
+                    # 빈 칸으로 '바꾸기'를 눌러 키워드가 모두 지워지지 않도록 아무것도 하지 않음
+                    st.warning("추가하거나 바꿀 키워드를 입력하세요.")
     
     # 결과 표시
     if filtered_data:
-        st.write(f"**총 {len(filtered_data)}개의 자료를 찾았습니다.**")
+        st.write(f"**총 {total_count}개의 자료를 찾았습니다.** ({page_number}페이지)")
         
-        for i, item in enumerate(filtered_data):
+        for item in filtered_data:
+            if batch_mode:
+                # 선택 상태는 batch_selected 에 두고, 다른 페이지를 보다 돌아와도 체크가 유지되도록 매번 맞춰 줌
+                select_key = f"select_{item['id']}"
+                st.session_state[select_key] = item['id'] in batch_selected
+                st.checkbox(f"선택: {item['title']}", key=select_key, on_change=toggle_selected, args=(item['id'],))
             with st.expander(f"📄 {item['title']} ({item['subject']} {item['grade_group']})"):
                 col1, col2 = st.columns([2, 1])
                 
@@ -164,100 +439,171 @@ with tab2:
                     st.write(f"**설명:** {item['description']}")
                     st.write(f"**키워드:** {', '.join(item['keywords'])}")
                     st.write(f"**업로드일:** {item['upload_date']}")
+                    
+                    # 관련 자료 (미리 계산된 이웃 목록)
+                    related = recommend_index.related(item['id'])
+                    if related:
+                        related_items = {r['id']: r for r in metadata_cache.get_many([rid for rid, _, _ in related])}
+                        st.write("**🔗 관련 자료:**")
+                        for related_id, score, shared in related:
+                            if related_id in related_items:
+                                r = related_items[related_id]
+                                shared_text = f" - 공통 키워드: {', '.join(shared)}" if shared else ""
+                                st.write(f"• {r['title']} ({r['subject']} {r['grade_group']}){shared_text}")
                 
                 with col2:
-                    # 파일 다운로드 버튼
-                    file_path = os.path.join(FILES_DIR, item['id'])
-                    if os.path.exists(file_path):
-                        with open(file_path, "rb") as f:
-                            st.download_button(
-                                label="📥 다운로드",
-                                data=f.read(),
-                                file_name=item['original_name'],
-                                mime=item['file_type']
-                            )
+                    # 미리보기 (백그라운드에서 만든 작은 이미지만 읽음)
+                    thumb_path = thumbnail_path(FILES_DIR, item_file_name(item))
+                    if os.path.exists(thumb_path):
+                        st.image(thumb_path, width=160)
                     
-                    # 삭제 버튼
-                    if st.button("🗑️ 삭제", key=f"delete_{i}"):
-                        # 파일 삭제
-                        if os.path.exists(file_path):
-                            os.remove(file_path)
-                        # 메타데이터에서 제거
-                        st.session_state.metadata.remove(item)
-                        save_metadata(st.session_state.metadata)
+                    # 파일 다운로드 버튼 (누를 때만 파일을 읽음)
+                    if should_stream(item['original_name']):
+                        st.link_button("📥 다운로드", stream_url(item_file_name(item)))
+                    elif should_stream_compressed(FILES_DIR, item_file_name(item)):
+                        # 압축 보관 중인 파일은 서버가 조각 단위로 풀면서 보냄
+                        st.link_button("📥 다운로드", stream_url(item_file_name(item), item['original_name']))
+                    else:
+                        st.download_button(
+                            label="📥 다운로드",
+                            data=lazy_file_reader(FILES_DIR, item_file_name(item), on_read=blob_tiering.touch),
+                            file_name=item['original_name'],
+                            mime=item['file_type'],
+                            key=f"download_{item['id']}",
+                            on_click="ignore"
+                        )
+                    
+                    # 삭제 버튼 (필터나 페이지가 바뀌어도 같은 자료를 가리키도록 id로 구분)
+                    if st.button("🗑️ 삭제", key=f"delete_{item['id']}"):
+                        delete_items([item['id']])
+                        st.session_state.batch_selected.discard(item['id'])
                         st.rerun()
     else:
         st.info("📝 아직 업로드된 자료가 없습니다. '자료 업로드' 탭에서 첫 번째 자료를 업로드해보세요!")
 
 # 탭 3: 통계 및 분석
-with tab3:
+with tab3, section("portfolio.tab.stats"):
     st.header("📊 학습 자료 통계")
     
-    if st.session_state.metadata:
+    # 필터가 없으면 업로드/삭제 때마다 갱신되는 집계를 읽고, 필터가 있으면 메타데이터 표에서 바로 계산
+    if any(filters.values()):
+        stats = metadata_frame.summary(top_keywords=10, **filters)
+        st.caption("사이드바에서 고른 과목/학년군/영역의 자료만 집계한 통계입니다.")
+        disk_usage = None
+    else:
+        stats = store.stats(top_keywords=10)
+        # (원래 크기, 실제 디스크 사용량, 압축 보관 중인 파일 수) - 같은 파일은 한 번만 셈
+        disk_usage = blob_tiering.totals()
+    
+    if stats["count"]:
         # 기본 통계
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("총 자료 수", len(st.session_state.metadata))
+            st.metric("총 자료 수", stats["count"])
         
         with col2:
-            subjects_count = len(set(item['subject'] for item in st.session_state.metadata))
-            st.metric("활용 과목 수", subjects_count)
+            st.metric("활용 과목 수", len(stats["subject"]))
         
         with col3:
-            total_size = sum(item['file_size'] for item in st.session_state.metadata)
-            st.metric("총 용량", f"{total_size / (1024*1024):.1f} MB")
+            if disk_usage is None:
+                total_size = stats["bytes"]
+                st.metric("총 용량", f"{total_size / (1024*1024):.1f} MB")
+            else:
+                total_size = disk_usage[1]
+                st.metric("총 용량 (디스크)", f"{total_size / (1024*1024):.1f} MB")
         
         with col4:
-            recent_uploads = len([item for item in st.session_state.metadata 
-                                if datetime.strptime(item['upload_date'], "%Y-%m-%d %H:%M:%S").date() == datetime.now().date()])
+            recent_uploads = stats["day"].get(datetime.now().strftime("%Y-%m-%d"), 0)
             st.metric("오늘 업로드", recent_uploads)
         
+        if disk_usage is not None and disk_usage[0]:
+            st.caption(f"💾 원래 크기 {disk_usage[0] / (1024*1024):.1f} MB → 실제 디스크 사용량 "
+                       f"{disk_usage[1] / (1024*1024):.1f} MB (오랫동안 쓰지 않은 문서 {disk_usage[2]}개 압축 보관)")
+        
         # 과목별 분포
         st.subheader("📈 과목별 자료 분포")
-        subject_counts = pd.Series([item['subject'] for item in st.session_state.metadata]).value_counts()
+        subject_counts = pd.Series(stats["subject"])
         st.bar_chart(subject_counts)
         
         # 학년군별 분포
         st.subheader("📈 학년군별 자료 분포")
-        grade_counts = pd.Series([item['grade_group'] for item in st.session_state.metadata]).value_counts()
+        grade_counts = pd.Series(stats["grade_group"])
         st.bar_chart(grade_counts)
         
         # 키워드 분석
         st.subheader("🔍 자주 사용되는 키워드")
-        all_keywords = []
-        for item in st.session_state.metadata:
-            all_keywords.extend(item['keywords'])
-        
-        if all_keywords:
-            keyword_counts = pd.Series(all_keywords).value_counts().head(10)
+        if stats["keyword"]:
+            keyword_counts = pd.Series(stats["keyword"])
             st.bar_chart(keyword_counts)
         
-        # 연계 추천 (간단한 키워드 기반)
+        # 연계 추천 (키워드/단원/영역/교과 간 연계 유사도 기반)
         st.subheader("🔗 연계 추천")
-        st.write("**동일한 키워드를 가진 다른 자료들:**")
+        st.write("**서로 가장 관련이 깊은 자료들:**")
         
-        # 모든 키워드 수집
-        keyword_to_files = {}
-        for item in st.session_state.metadata:
-            for keyword in item['keywords']:
-                if keyword not in keyword_to_files:
-                    keyword_to_files[keyword] = []
-                keyword_to_files[keyword].append(item)
-        
-        # 키워드별 연계 자료 표시
-        for keyword, files in keyword_to_files.items():
-            if len(files) > 1:  # 2개 이상의 자료가 있는 키워드만
-                with st.expander(f"🔑 '{keyword}' 키워드 ({len(files)}개 자료)"):
-                    for file in files:
-                        st.write(f"• {file['title']} ({file['subject']} {file['grade_group']})")
+        top_pairs = recommend_index.top_pairs(limit=10)
+        pair_items = {r['id']: r for r in metadata_cache.get_many(list({i for a, b, _ in top_pairs for i in (a, b)}))}
+        for a_id, b_id, score in top_pairs:
+            if a_id in pair_items and b_id in pair_items:
+                a, b = pair_items[a_id], pair_items[b_id]
+                st.write(f"• {a['title']} ({a['subject']} {a['grade_group']}) ↔ "
+                         f"{b['title']} ({b['subject']} {b['grade_group']}) - 유사도 {score:.2f}")
     else:
         st.info("📊 업로드된 자료가 있어야 통계를 볼 수 있습니다.")
 
+# 탭 4: 교육과정 탐색 (한 번에 한 노드의 바로 아래 항목만 읽음)
+with tab4, section("portfolio.tab.tree"):
+    st.header("🌳 교육과정 탐색")
+    
+    def open_tree_node(names):
+        st.session_state.tree_names = names
+        st.session_state.tree_page = 1
+    
+    tree_names = st.session_state.setdefault("tree_names", [])
+    tree_path = node_path(tree_names)
+    tree_node = curriculum_tree.node(tree_path)
+    if tree_node is None:
+        # 보고 있던 노드의 자료가 모두 삭제됨
+        st.session_state.tree_names = tree_names = []
+        tree_path = ""
+        tree_node = curriculum_tree.node(tree_path)
+    
+    # 현재 위치 (누르면 그 단계로 이동)
+    crumb_cols = st.columns(len(tree_names) + 1)
+    crumb_cols[0].button("🏠 전체", key="tree_crumb_0", on_click=open_tree_node, args=([],))
+    for depth, name in enumerate(tree_names, 1):
+        crumb_cols[depth].button(name, key=f"tree_crumb_{depth}", on_click=open_tree_node, args=(tree_names[:depth],))
+    
+    if tree_node is None or tree_node[1] == 0:
+        st.info("📝 아직 업로드된 자료가 없습니다.")
+    else:
+        st.write(f"**자료 {tree_node[1]}개 · {tree_node[2] / (1024*1024):.1f} MB**")
+        
+        if len(tree_names) < len(LEVELS):
+            st.subheader(f"📂 {LEVEL_NAMES[len(tree_names)]}")
+            entry_count = curriculum_tree.child_count(tree_path)
+        else:
+            st.subheader("📄 자료")
+            entry_count = tree_node[1]
+        
+        tree_page_count = max(1, math.ceil(entry_count / TREE_PAGE_SIZE))
+        tree_page = 1
+        if tree_page_count > 1:
+            tree_page = st.number_input("페이지", min_value=1, max_value=tree_page_count, step=1, key="tree_page")
+        tree_offset = (tree_page - 1) * TREE_PAGE_SIZE
+        
+        if len(tree_names) < len(LEVELS):
+            for name, _, count, size in curriculum_tree.children(tree_path, tree_offset, TREE_PAGE_SIZE):
+                st.button(f"📁 {name} — 자료 {count}개 · {size / (1024*1024):.1f} MB",
+                          key=f"tree_node_{name}", on_click=open_tree_node, args=(tree_names + [name],))
+        else:
+            for item in metadata_cache.get_many(curriculum_tree.item_ids(tree_path, tree_offset, TREE_PAGE_SIZE)):
+                st.write(f"📄 **{item['title']}** ({item['original_name']}, "
+                         f"{item['file_size'] / (1024*1024):.1f} MB, {item['upload_date']})")
+
 # 푸터
 st.markdown("---")
 st.markdown("💡 **팁:** 키워드를 잘 설정하면 나중에 연계 자료를 쉽게 찾을 수 있어요!")
 
-
-
-
+# 실행 시간 측정 끝
+app_metrics.end_run()